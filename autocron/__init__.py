@@ -12,10 +12,14 @@ Note: As of v1.3.0, the internal structure has been reorganized into subpackages
 For backward compatibility, all public APIs remain importable from autocron directly.
 """
 
-from typing import TYPE_CHECKING
+import os
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
 
-# Import from new structure (v1.3.0+)
-from autocron.core.scheduler import (
+from autocron.version import __version__
+
+if TYPE_CHECKING:
+ from autocron.core.scheduler import (
  AutoCron,
  SchedulingError,
  Task,
@@ -24,23 +28,7 @@ from autocron.core.scheduler import (
  reset_global_scheduler,
  schedule,
  start_scheduler,
-)
-from autocron.version import __version__
-
-# Optional dashboard imports
-try:
- from autocron.interface.dashboard import (
- Dashboard,
- TaskAnalytics,
- live_monitor,
- show_dashboard,
- show_task,
  )
-
- _dashboard_available = True
-except ImportError:
- _dashboard_available = False
- if TYPE_CHECKING:
  from autocron.interface.dashboard import (
  Dashboard,
  TaskAnalytics,
@@ -48,12 +36,46 @@ except ImportError:
  show_dashboard,
  show_task,
  )
+
+# Public symbols are resolved on first access (PEP 562) so that
+# ``import autocron`` stays cheap and does not pull in rich.
+_SCHEDULER_EXPORTS = frozenset(
+ {
+ "AutoCron",
+ "SchedulingError",
+ "Task",
+ "TaskExecutionError",
+ "get_global_scheduler",
+ "reset_global_scheduler",
+ "schedule",
+ "start_scheduler",
+ }
+)
+_DASHBOARD_EXPORTS = frozenset(
+ {"Dashboard", "TaskAnalytics", "live_monitor", "show_dashboard", "show_task"}
+)
+
+
+def __getattr__(name: str) -> Any:
+ """Lazily import public symbols from their defining modules."""
+ if name in _SCHEDULER_EXPORTS:
+ value = getattr(import_module("autocron.core.scheduler"), name)
+ elif name in _DASHBOARD_EXPORTS:
+ # The dashboard is optional: its symbols are None when it cannot be imported
+ try:
+ value = getattr(import_module("autocron.interface.dashboard"), name)
+ except ImportError:
+ value = None
  else:
- Dashboard = None # type: ignore
- TaskAnalytics = None # type: ignore
- live_monitor = None # type: ignore
- show_dashboard = None # type: ignore
- show_task = None # type: ignore
+ raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+ globals()[name] = value
+ return value
+
+
+def __dir__() -> List[str]:
+ """List module attributes including the lazily imported public symbols."""
+ return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
  "AutoCron",
@@ -71,3 +93,10 @@ __all__ = [
  "show_task",
  "start_scheduler",
 ]
+
+# Long-lived processes can opt into resolving everything up front
+if os.environ.get("AUTOCRON_EAGER_IMPORT"):
+ for _name in __all__:
+ if _name not in globals():
+ __getattr__(_name)
+ del _name
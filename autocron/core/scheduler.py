@@ -6,18 +6,28 @@ Provides the main scheduler class and decorators for task scheduling.
 
 import asyncio
 import contextlib
+import heapq
+import importlib
 import inspect
+import io
+import itertools
 import json
+import math
 import os
+import queue
 import subprocess # nosec B404 - Required for executing Python scripts
 import sys
+import tempfile
 import threading
 import time
 import uuid
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, partial, wraps
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from autocron.core.os_adapters import OSAdapter, OSAdapterError, get_os_adapter
 from autocron.core.utils import (
@@ -29,17 +39,15 @@ from autocron.core.utils import (
 from autocron.interface.notifications import get_notification_manager
 from autocron.logging.logger import get_logger
 
-# Optional analytics import
 try:
- from autocron.interface.dashboard import TaskAnalytics
+ import orjson
 
- ANALYTICS_AVAILABLE = True
+ ORJSON_AVAILABLE = True
 except ImportError:
- ANALYTICS_AVAILABLE = False
- if TYPE_CHECKING:
+ ORJSON_AVAILABLE = False
+
+if TYPE_CHECKING:
  from autocron.interface.dashboard import TaskAnalytics
- else:
- TaskAnalytics = None # type: ignore
 
 
 class TaskExecutionError(Exception):
@@ -54,6 +62,405 @@ class SchedulingError(Exception):
  pass
 
 
+def _yaml_load(stream: Any) -> Any:
+ """Parse YAML with libyaml's C loader when PyYAML was built with it."""
+ import yaml
+
+ return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) # nosec B506
+
+
+def _yaml_dump(data: Any, stream: Any) -> None:
+ """Write block-style UTF-8 YAML in insertion order, using libyaml's C emitter if available."""
+ import yaml
+
+ yaml.dump(
+ data,
+ stream,
+ Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+ default_flow_style=False,
+ sort_keys=False,
+ allow_unicode=True,
+ )
+
+
+def _read_text(file: Any, max_chars: Optional[int] = None) -> str:
+ """Decode a captured output file (up to max_chars) the way subprocess text mode would."""
+ file.seek(0)
+ reader = io.TextIOWrapper(file, newline=None)
+ try:
+ return reader.read(max_chars)
+ finally:
+ reader.detach()
+
+
+def _run_captured(
+ cmd: List[str],
+ timeout: Optional[float],
+ on_spawn: Optional[Callable[[int], None]] = None,
+ max_output: Optional[int] = None,
+ **kwargs: Any,
+) -> "subprocess.CompletedProcess[str]":
+ """
+ Run a command like ``subprocess.run(check=True, capture_output=True, text=True)``.
+
+ The child writes stdout/stderr straight to temporary files instead of pipes, so
+ large outputs never block on a full pipe and the parent does no reads while the
+ command runs; output is only loaded once the process has exited.
+
+ ``on_spawn`` is called with the child's PID right after it starts, from the parent;
+ if it raises, the child is killed and the exception propagates.
+ ``max_output`` caps how many characters of stdout/stderr are decoded; the rest of
+ the output stays in the temporary file and is never read into memory.
+
+ Raises:
+ subprocess.TimeoutExpired: If the command runs past timeout (it is killed)
+ subprocess.CalledProcessError: If the command exits with a non-zero code
+ """
+ with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+ # nosec B603 - Controlled execution of user-specified Python scripts
+ with subprocess.Popen(cmd, stdout=out, stderr=err, **kwargs) as proc:
+ try:
+ if on_spawn is not None:
+ on_spawn(proc.pid)
+ proc.wait(timeout=timeout)
+ except BaseException: # Timed out, or on_spawn failed: don't leave it running
+ proc.kill()
+ proc.wait()
+ raise
+ stdout, stderr = _read_text(out, max_output), _read_text(err, max_output)
+
+ if proc.returncode:
+ raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+ return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+def _windows_assign_to_job(
+ pid: int,
+ max_memory_bytes: Optional[int],
+ cpu_seconds: Optional[float],
+ max_cpu_percent: Optional[float] = None,
+) -> None:
+ """
+ Put a Windows process into a new Job Object that enforces resource limits.
+
+ The kernel fails allocations past ``max_memory_bytes``, terminates the process once
+ it has used ``cpu_seconds`` of user CPU time and throttles it to ``max_cpu_percent``.
+ The job handle is closed after assignment; the job lives as long as the process.
+
+ Raises:
+ OSError: If the job cannot be created or the process cannot be assigned to it
+ """
+ import ctypes
+ from ctypes import wintypes
+
+ class BasicLimitInformation(ctypes.Structure):
+ _fields_ = [
+ ("PerProcessUserTimeLimit", ctypes.c_int64),
+ ("PerJobUserTimeLimit", ctypes.c_int64),
+ ("LimitFlags", wintypes.DWORD),
+ ("MinimumWorkingSetSize", ctypes.c_size_t),
+ ("MaximumWorkingSetSize", ctypes.c_size_t),
+ ("ActiveProcessLimit", wintypes.DWORD),
+ ("Affinity", ctypes.c_size_t),
+ ("PriorityClass", wintypes.DWORD),
+ ("SchedulingClass", wintypes.DWORD),
+ ]
+
+ class ExtendedLimitInformation(ctypes.Structure):
+ _fields_ = [
+ ("BasicLimitInformation", BasicLimitInformation),
+ ("IoInfo", ctypes.c_uint64 * 6),
+ ("ProcessMemoryLimit", ctypes.c_size_t),
+ ("JobMemoryLimit", ctypes.c_size_t),
+ ("PeakProcessMemoryUsed", ctypes.c_size_t),
+ ("PeakJobMemoryUsed", ctypes.c_size_t),
+ ]
+
+ class CpuRateControlInformation(ctypes.Structure):
+ _fields_ = [("ControlFlags", wintypes.DWORD), ("CpuRate", wintypes.DWORD)]
+
+ kernel32 = ctypes.WinDLL("kernel32", use_last_error=True) # type: ignore[attr-defined]
+ kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+ kernel32.CreateJobObjectW.argtypes = [ctypes.c_void_p, wintypes.LPCWSTR]
+ kernel32.OpenProcess.restype = wintypes.HANDLE
+ kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+ kernel32.SetInformationJobObject.argtypes = [
+ wintypes.HANDLE,
+ ctypes.c_int,
+ ctypes.c_void_p,
+ wintypes.DWORD,
+ ]
+ kernel32.AssignProcessToJobObject.argtypes = [wintypes.HANDLE, wintypes.HANDLE]
+ kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+ def check(ok: Any) -> Any:
+ if not ok:
+ raise ctypes.WinError(ctypes.get_last_error()) # type: ignore[attr-defined]
+ return ok
+
+ # Constants from winnt.h
+ JOB_OBJECT_LIMIT_PROCESS_TIME = 0x2
+ JOB_OBJECT_LIMIT_PROCESS_MEMORY = 0x100
+ JOB_OBJECT_CPU_RATE_CONTROL_ENABLE = 0x1
+ JOB_OBJECT_CPU_RATE_CONTROL_HARD_CAP = 0x4
+ JOB_OBJECT_EXTENDED_LIMIT_INFORMATION = 9
+ JOB_OBJECT_CPU_RATE_CONTROL_INFORMATION = 15
+ PROCESS_TERMINATE = 0x1
+ PROCESS_SET_QUOTA = 0x100
+
+ limits = ExtendedLimitInformation()
+ if max_memory_bytes:
+ limits.BasicLimitInformation.LimitFlags |= JOB_OBJECT_LIMIT_PROCESS_MEMORY
+ limits.ProcessMemoryLimit = max_memory_bytes
+ if cpu_seconds:
+ # CPU time is given in 100-nanosecond ticks
+ limits.BasicLimitInformation.LimitFlags |= JOB_OBJECT_LIMIT_PROCESS_TIME
+ limits.BasicLimitInformation.PerProcessUserTimeLimit = int(cpu_seconds * 10_000_000)
+
+ job = check(kernel32.CreateJobObjectW(None, None))
+ try:
+ check(
+ kernel32.SetInformationJobObject(
+ job,
+ JOB_OBJECT_EXTENDED_LIMIT_INFORMATION,
+ ctypes.byref(limits),
+ ctypes.sizeof(limits),
+ )
+ )
+ if max_cpu_percent:
+ # CPU rate is given in hundredths of a percent
+ rate = CpuRateControlInformation(
+ JOB_OBJECT_CPU_RATE_CONTROL_ENABLE | JOB_OBJECT_CPU_RATE_CONTROL_HARD_CAP,
+ max(1, min(10000, int(max_cpu_percent * 100))),
+ )
+ check(
+ kernel32.SetInformationJobObject(
+ job,
+ JOB_OBJECT_CPU_RATE_CONTROL_INFORMATION,
+ ctypes.byref(rate),
+ ctypes.sizeof(rate),
+ )
+ )
+ process = check(kernel32.OpenProcess(PROCESS_SET_QUOTA | PROCESS_TERMINATE, False, pid))
+ try:
+ check(kernel32.AssignProcessToJobObject(job, process))
+ finally:
+ kernel32.CloseHandle(process)
+ finally:
+ kernel32.CloseHandle(job)
+
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+_PROC_SELF_CGROUP = Path("/proc/self/cgroup")
+_CGROUP_CPU_PERIOD = 100000
+_CGROUP_CONTROLLERS = frozenset({"cpu", "memory"})
+_CGROUP_SCHEDULER_LEAF = "autocron-scheduler"
+
+
+def _cgroup_is_delegated(group: Path) -> bool:
+ """
+ Check whether a cgroup was delegated to this process.
+
+ systemd marks units with ``Delegate=yes`` via a ``delegate`` xattr; the kernel's own
+ delegation model hands a group over by chowning it to an unprivileged user.
+ """
+ for attr in ("trusted.delegate", "user.delegate"):
+ with contextlib.suppress(OSError, AttributeError):
+ if os.getxattr(group, attr) == b"1":
+ return True
+ try:
+ euid = os.geteuid()
+ return euid != 0 and group.stat().st_uid == euid
+ except (OSError, AttributeError):
+ return False
+
+
+@lru_cache(maxsize=None)
+def _ensure_autocron_cgroup() -> Optional[Path]:
+ """
+ Prepare this process's own cgroup v2 group to hold safe-mode runs.
+
+ Runs become children of the scheduler's cgroup, so they stay inside its service
+ unit and its limits. This is only done when that group was delegated to us and is
+ not the root. A group can only pass cpu and memory down once it holds no processes
+ itself, so the scheduler first moves into a leaf child of its own group.
+
+ Returns:
+ Path of the parent cgroup, or None to fall back to resource limits
+ """
+ if not (_CGROUP_ROOT / "cgroup.controllers").exists():
+ return None
+ try:
+ lines = _PROC_SELF_CGROUP.read_text().splitlines()
+ except OSError:
+ return None
+ own = next((line[3:] for line in lines if line.startswith("0::")), "/")
+ if own.strip("/") == "":
+ return None
+ parent = _CGROUP_ROOT / own.lstrip("/")
+ if not _cgroup_is_delegated(parent):
+ return None
+ try:
+ subtree = parent / "cgroup.subtree_control"
+ if not _CGROUP_CONTROLLERS <= set(subtree.read_text().split()):
+ available = set((parent / "cgroup.controllers").read_text().split())
+ # Anything else living in the group would keep it from enabling controllers
+ others = set((parent / "cgroup.procs").read_text().split()) - {str(os.getpid())}
+ if not _CGROUP_CONTROLLERS <= available or others:
+ return None
+ leaf = parent / _CGROUP_SCHEDULER_LEAF
+ leaf.mkdir(exist_ok=True)
+ (leaf / "cgroup.procs").write_text(str(os.getpid()))
+ subtree.write_text("+cpu +memory")
+ except OSError:
+ return None
+ return parent
+
+
+def _create_run_cgroup(
+ max_memory_bytes: Optional[int], max_cpu_percent: Optional[float]
+) -> Optional[Path]:
+ """
+ Create a cgroup v2 group for one safe-mode run, enforcing the given limits.
+
+ ``memory.max`` caps the memory of the whole process tree and ``cpu.max`` throttles
+ it to ``max_cpu_percent`` of the usable cores.
+
+ Returns:
+ Path of the new cgroup, or None if cgroups cannot be used
+ """
+ parent = _ensure_autocron_cgroup()
+ if parent is None:
+ return None
+ group = parent / f"autocron-run-{uuid.uuid4().hex}"
+ try:
+ group.mkdir()
+ except OSError:
+ return None
+ try:
+ if max_memory_bytes:
+ (group / "memory.max").write_text(str(max_memory_bytes))
+ if max_cpu_percent:
+ cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 1
+ quota = max(1000, int(_CGROUP_CPU_PERIOD * cpus * max_cpu_percent / 100))
+ (group / "cpu.max").write_text(f"{quota} {_CGROUP_CPU_PERIOD}")
+ except OSError:
+ _remove_run_cgroup(group)
+ return None
+ return group
+
+
+def _remove_run_cgroup(group: Path) -> None:
+ """Kill anything left in a safe-mode run's cgroup and remove the group."""
+ with contextlib.suppress(OSError):
+ (group / "cgroup.kill").write_text("1")
+ with contextlib.suppress(OSError):
+ group.rmdir()
+
+
+def _is_coroutine_function(func: Callable) -> bool:
+ """
+ Check whether func is async: a coroutine function, a partial of one, or an object
+ with an async ``__call__``.
+
+ ``__wrapped__`` is not followed, since a sync decorator may run the coroutine itself.
+ """
+ if inspect.iscoroutinefunction(func):
+ return True
+ if inspect.isroutine(func) or inspect.isclass(func):
+ return False
+ return inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+ """Create an event loop, preferring uvloop (or winloop on Windows) when installed."""
+ for name in ("uvloop", "winloop"):
+ try:
+ return importlib.import_module(name).new_event_loop()
+ except ImportError:
+ continue
+ return asyncio.new_event_loop()
+
+
+@lru_cache(maxsize=256)
+def _cron_for_interval(interval: str) -> str:
+ """Convert an interval string to a cron expression (simplified), cached per string."""
+ seconds = parse_interval(interval)
+
+ if seconds < 60:
+ return f"*/{seconds} * * * * *"
+ elif seconds < 3600:
+ minutes = seconds // 60
+ return f"*/{minutes} * * * *"
+ elif seconds < 86400:
+ hours = seconds // 3600
+ return f"0 */{hours} * * *"
+ else:
+ return "0 0 * * *"
+
+
+class _DaemonWorkers:
+ """
+ Reusable daemon threads for running sync task functions under a timeout.
+
+ An idle thread is reused when there is one; otherwise a new thread is started,
+ so a call never queues behind a hung function. Unlike ThreadPoolExecutor
+ workers, the threads are daemons and never hold up interpreter exit.
+ """
+
+ # Seconds an idle thread waits for work before exiting
+ IDLE_TIMEOUT = 60.0
+
+ def __init__(self, name: str):
+ self._name = name
+ self._jobs: "queue.SimpleQueue[Tuple[Callable[[], Any], Future]]" = queue.SimpleQueue()
+ # Idle threads not yet claimed by a submitted job
+ self._idle = 0
+ self._lock = threading.Lock()
+
+ def submit(self, func: Callable[[], Any]) -> Future:
+ """Run func on an idle or new daemon thread and return its future."""
+ future: Future = Future()
+ with self._lock:
+ spawn = self._idle == 0
+ if not spawn:
+ self._idle -= 1
+ self._jobs.put((func, future))
+ if spawn:
+ threading.Thread(target=self._work, name=self._name, daemon=True).start()
+ return future
+
+ def _work(self) -> None:
+ """Run jobs until idle for IDLE_TIMEOUT with no job claiming this thread."""
+ while True:
+ try:
+ func, future = self._jobs.get(timeout=self.IDLE_TIMEOUT)
+ except queue.Empty:
+ with self._lock:
+ # An idle count of zero means a submitter already claimed this thread
+ if self._idle:
+ self._idle -= 1
+ return
+ continue
+
+ future.set_running_or_notify_cancel()
+ error: Optional[BaseException] = None
+ try:
+ result = func()
+ except BaseException as e:
+ error = e
+ result = None
+
+ # Become idle before publishing the outcome so the caller's next call reuses us
+ with self._lock:
+ self._idle += 1
+ if error is None:
+ future.set_result(result)
+ else:
+ future.set_exception(error)
+ del func, future, result, error
+
+
 class Task:
  """
  Represents a scheduled task.
@@ -79,6 +486,48 @@ class Task:
  fail_count: Number of failures
  """
 
+ # Fixed attribute layout: no per-task __dict__, faster attribute access
+ __slots__ = (
+ "task_id",
+ "name",
+ "_func",
+ "_is_coroutine",
+ "script",
+ "retries",
+ "retry_delay",
+ "timeout",
+ "_notify",
+ "_notify_channels",
+ "email_config",
+ "on_success",
+ "on_failure",
+ "_on_reschedule",
+ "_enabled",
+ "safe_mode",
+ "max_memory_mb",
+ "max_cpu_percent",
+ "schedule_type",
+ "schedule_value",
+ "interval_seconds",
+ "last_run",
+ "_next_run",
+ "_next_run_mono",
+ "run_count",
+ "fail_count",
+ "_lock",
+ )
+
+ def __new__(cls, *args: Any, **kwargs: Any) -> "Task":
+ """Create an IntervalTask or CronTask, so next-run logic needs no type check."""
+ if cls is Task:
+ every = kwargs["every"] if "every" in kwargs else (args[3] if len(args) > 3 else None)
+ cron = kwargs["cron"] if "cron" in kwargs else (args[4] if len(args) > 4 else None)
+ if every is not None and cron is None:
+ cls = IntervalTask
+ elif cron is not None and every is None:
+ cls = CronTask
+ return super().__new__(cls)
+
  def __init__(
  self,
  name: str,
@@ -96,6 +545,9 @@ class Task:
  safe_mode: bool = False,
  max_memory_mb: Optional[int] = None,
  max_cpu_percent: Optional[int] = None,
+ *,
+ next_run: Optional[datetime] = None,
+ task_id: Optional[str] = None,
  ):
  """
  Initialize task.
@@ -116,6 +568,8 @@ class Task:
  safe_mode: Enable sandboxed execution (subprocess isolation)
  max_memory_mb: Maximum memory limit in MB (safe mode only)
  max_cpu_percent: Maximum CPU usage percent (safe mode only)
+ next_run: First execution time; computed from the schedule if omitted
+ task_id: Existing task ID to keep; a new UUID is generated if omitted
  """
  if func is None and script is None:
  raise ValueError("Either func or script must be provided")
@@ -129,10 +583,11 @@ class Task:
  if every is not None and cron is not None:
  raise ValueError("Only one of every or cron can be provided")
 
- self.task_id = str(uuid.uuid4())
+ self.task_id = task_id or str(uuid.uuid4())
  self.name = name
  self.func = func
- self.script = script
+ # Several tasks often run the same script; share one path string between them
+ self.script = sys.intern(script) if type(script) is str else script
  self.retries = retries
  self.retry_delay = retry_delay
  self.timeout = timeout
@@ -140,48 +595,97 @@ class Task:
  self.email_config = email_config
  self.on_success = on_success
  self.on_failure = on_failure
- self.enabled = True
+ # Called whenever next_run or enabled changes so a scheduler can requeue the task
+ self._on_reschedule: Optional[Callable[["Task"], None]] = None
+ self._enabled = True
 
  # Safe mode configuration
  self.safe_mode = safe_mode
  self.max_memory_mb = max_memory_mb
  self.max_cpu_percent = max_cpu_percent
 
- # Schedule configuration
+ # Schedule configuration; interned since many tasks share a few schedule strings
  if every is not None:
  self.schedule_type = "interval"
- self.schedule_value = every
  self.interval_seconds = parse_interval(every)
+ self.schedule_value = sys.intern(every)
  else:
  self.schedule_type = "cron"
- self.schedule_value = cron or ""
  if cron and not validate_cron_expression(cron):
  raise ValueError(f"Invalid cron expression: {cron}")
+ self.schedule_value = sys.intern(cron or "")
 
  # Execution tracking
  self.last_run: Optional[datetime] = None
- self.next_run: Optional[datetime] = self._calculate_next_run()
+ self._next_run: Optional[datetime] = None
+ # next_run as a time.monotonic() deadline, so due checks are immune to clock steps
+ self._next_run_mono: Optional[float] = None
+ self._set_next_run(next_run or self._calculate_next_run())
  self.run_count = 0
  self.fail_count = 0
  self._lock = threading.Lock()
 
- def _calculate_next_run(self) -> datetime:
- """Calculate next run time."""
- if self.schedule_type == "interval":
- return (
- datetime.now()
- if self.last_run is None
- else self.last_run + timedelta(seconds=self.interval_seconds)
+ @property
+ def next_run(self) -> Optional[datetime]:
+ """Next scheduled execution time."""
+ return self._next_run
+
+ @next_run.setter
+ def next_run(self, value: Optional[datetime]) -> None:
+ self._set_next_run(value)
+ if self._on_reschedule is not None:
+ self._on_reschedule(self)
+
+ def _set_next_run(self, value: Optional[datetime]) -> None:
+ """Store next_run along with its monotonic-clock deadline."""
+ self._next_run = value
+ self._next_run_mono = (
+ None if value is None else time.monotonic() + (value.timestamp() - time.time())
  )
- base_time = self.last_run or datetime.now()
- return get_next_run_time(self.schedule_value, base_time)
+
+ @property
+ def func(self) -> Optional[Callable]:
+ """Function to execute."""
+ return self._func
+
+ @func.setter
+ def func(self, value: Optional[Callable]) -> None:
+ self._func = value
+ # Classified once here so each run picks the sync or async path from a flag
+ self._is_coroutine = value is not None and _is_coroutine_function(value)
+
+ @property
+ def notify(self) -> Optional[Union[str, List[str]]]:
+ """Notification channels as configured."""
+ return self._notify
+
+ @notify.setter
+ def notify(self, value: Optional[Union[str, List[str]]]) -> None:
+ self._notify = value
+ # Normalized once here so notifying after each run is a plain attribute read
+ self._notify_channels = (value,) if isinstance(value, str) else tuple(value or ())
+
+ @property
+ def enabled(self) -> bool:
+ """Whether the task is enabled."""
+ return self._enabled
+
+ @enabled.setter
+ def enabled(self, value: bool) -> None:
+ self._enabled = value
+ if self._on_reschedule is not None:
+ self._on_reschedule(self)
+
+ def _calculate_next_run(self) -> datetime:
+ """Calculate next run time; implemented by IntervalTask and CronTask."""
+ raise TypeError(f"{type(self).__name__} does not implement _calculate_next_run")
 
  def should_run(self) -> bool:
  """Check if task should run now."""
- if not self.enabled:
+ if not self._enabled or self._next_run_mono is None:
  return False
 
- return False if self.next_run is None else datetime.now() >= self.next_run
+ return time.monotonic() >= self._next_run_mono
 
  def update_next_run(self) -> None:
  """Update next run time."""
@@ -189,6 +693,22 @@ class Task:
  self.last_run = datetime.now()
  self.next_run = self._calculate_next_run()
 
+ def complete_run(self, success: bool) -> None:
+ """
+ Record a finished run and schedule the next one under a single lock.
+
+ Args:
+ success: Whether the run succeeded (counted in run_count) or
+ failed after its last retry (counted in fail_count)
+ """
+ with self._lock:
+ if success:
+ self.run_count += 1
+ else:
+ self.fail_count += 1
+ self.last_run = datetime.now()
+ self.next_run = self._calculate_next_run()
+
  def increment_run_count(self) -> None:
  """Increment run count."""
  with self._lock:
@@ -211,6 +731,7 @@ class Task:
  Returns:
  Dictionary containing task configuration and state
  """
+ last_run, next_run = self.last_run, self._next_run
  return {
  "task_id": self.task_id,
  "name": self.name,
@@ -222,12 +743,14 @@ class Task:
  "timeout": self.timeout,
  "notify": self.notify,
  "email_config": self.email_config,
- "enabled": self.enabled,
+ "enabled": self._enabled,
  "safe_mode": self.safe_mode,
  "max_memory_mb": self.max_memory_mb,
  "max_cpu_percent": self.max_cpu_percent,
- "last_run": self.last_run.isoformat() if self.last_run else None,
- "next_run": self.next_run.isoformat() if self.next_run else None,
+ "last_run": last_run.isoformat() if last_run else None,
+ "next_run": next_run.isoformat() if next_run else None,
+ "last_run_epoch": last_run.timestamp() if last_run else None,
+ "next_run_epoch": next_run.timestamp() if next_run else None,
  "run_count": self.run_count,
  "fail_count": self.fail_count,
  }
@@ -252,7 +775,18 @@ class Task:
  "Function-based tasks must be registered programmatically."
  )
 
- # Create task with schedule
+ # Prefer epoch fields; files saved by older versions only have ISO strings
+ last_run = next_run = None
+ if data.get("last_run_epoch") is not None:
+ last_run = datetime.fromtimestamp(data["last_run_epoch"])
+ elif data.get("last_run"):
+ last_run = datetime.fromisoformat(data["last_run"])
+ if data.get("next_run_epoch") is not None:
+ next_run = datetime.fromtimestamp(data["next_run_epoch"])
+ elif data.get("next_run"):
+ next_run = datetime.fromisoformat(data["next_run"])
+
+ # Create task with schedule; the schedule is only evaluated without a saved next_run
  task = cls(
  name=data["name"],
  script=data["script"],
@@ -266,22 +800,41 @@ class Task:
  safe_mode=data.get("safe_mode", False),
  max_memory_mb=data.get("max_memory_mb"),
  max_cpu_percent=data.get("max_cpu_percent"),
+ next_run=next_run,
+ task_id=data.get("task_id"),
  )
 
  # Restore state
- task.task_id = data.get("task_id", str(uuid.uuid4()))
  task.enabled = data.get("enabled", True)
  task.run_count = data.get("run_count", 0)
  task.fail_count = data.get("fail_count", 0)
-
- if data.get("last_run"):
- task.last_run = datetime.fromisoformat(data["last_run"])
- if data.get("next_run"):
- task.next_run = datetime.fromisoformat(data["next_run"])
+ task.last_run = last_run
 
  return task
 
 
+class IntervalTask(Task):
+ """Task scheduled at a fixed interval (``every=``)."""
+
+ __slots__ = ()
+
+ def _calculate_next_run(self) -> datetime:
+ """Calculate next run time."""
+ if self.last_run is None:
+ return datetime.now()
+ return self.last_run + timedelta(seconds=self.interval_seconds)
+
+
+class CronTask(Task):
+ """Task scheduled by a cron expression (``cron=``)."""
+
+ __slots__ = ()
+
+ def _calculate_next_run(self) -> datetime:
+ """Calculate next run time."""
+ return get_next_run_time(self.schedule_value, self.last_run or datetime.now())
+
+
 class AutoCron:
  """
  Main scheduler class for AutoCron.
@@ -289,6 +842,16 @@ class AutoCron:
  Manages task scheduling, execution, and lifecycle.
  """
 
+ # Stale heap entries tolerated before the heap is rebuilt
+ HEAP_SLACK = 64
+ # Longest the loop sleeps between clock checks, since time.monotonic() may stop
+ # while the machine is suspended
+ MAX_WAIT = 60.0
+ # Seconds the wall clock may gain on the monotonic clock before deadlines are re-derived
+ CLOCK_JUMP_TOLERANCE = 1.0
+ # Characters of script output returned from safe mode
+ SAFE_MODE_OUTPUT_LIMIT = 10000
+
  def __init__(
  self,
  log_path: Optional[str] = None,
@@ -307,19 +870,53 @@ class AutoCron:
  """
  self.logger = get_logger(log_path=log_path, log_level=log_level)
  self.notification_manager = get_notification_manager()
+ # Copy-on-write: writers build a new dict under _lock and publish it with one
+ # assignment, so readers can use self.tasks without locking
  self.tasks: Dict[str, Task] = {}
+ # Name -> id of the first task registered under that name, published with self.tasks
+ self._task_names: Dict[str, str] = {}
  self.max_workers = max_workers
  self.use_os_scheduler = use_os_scheduler
  self._running = False
  self._thread: Optional[threading.Thread] = None
- self._executor_threads: List[threading.Thread] = []
+ self._pool: Optional[ThreadPoolExecutor] = None
+ # Bounds runs that are executing or waiting for a worker
+ self._run_slots = threading.BoundedSemaphore(max_workers * 2)
  self._lock = threading.Lock()
 
- # Analytics tracking (optional)
- self.analytics = None
- if ANALYTICS_AVAILABLE:
+ # Min-heap of (monotonic deadline, task_id, token) entries driving the main loop.
+ # Entries whose token no longer matches _tokens[task_id] are stale and skipped.
+ # Only the loop thread touches the heap; other threads post (task_id, task, at)
+ # commands to _commands, where a task of None means the task was removed.
+ self._heap: List[Tuple[float, str, int]] = []
+ self._tokens: Dict[str, int] = {}
+ self._token_counter = itertools.count(1)
+ self._commands: "queue.SimpleQueue[Tuple[str, Optional[Task], Optional[float]]]" = (
+ queue.SimpleQueue()
+ )
+ self._wake = threading.Event()
+ # Monotonic deadline the loop is sleeping until; only earlier deadlines wake it
+ self._next_wake = math.inf
+ # Wall-clock minus monotonic time at the last loop pass, to notice a suspend
+ self._clock_offset = time.time() - time.monotonic()
+
+ # Daemon threads for sync task functions with a timeout
+ self._sync_workers = _DaemonWorkers("autocron-sync")
+
+ # Event loop for async task functions, started on first use
+ self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+ self._async_thread: Optional[threading.Thread] = None
+ self._async_loop_stopper: Optional[weakref.finalize] = None
+ self._async_loop_lock = threading.Lock()
+
+ # Analytics tracking (optional, imported here to keep rich off the import path)
+ self.analytics: Optional["TaskAnalytics"] = None
  try:
- self.analytics = TaskAnalytics()
+ from autocron.interface import dashboard
+
+ self.analytics = dashboard.TaskAnalytics()
+ except ImportError:
+ pass
  except Exception as e:
  self.logger.warning(f"Analytics unavailable: {e}")
 
@@ -396,7 +993,8 @@ class AutoCron:
  )
 
  with self._lock:
- self.tasks[task.task_id] = task
+ self._publish_tasks({**self.tasks, task.task_id: task})
+ self._track_task(task)
 
  # Set up notifications if configured
  if notify:
@@ -427,10 +1025,14 @@ class AutoCron:
  True if removed, False otherwise
  """
  with self._lock:
- if task_id:
- if task_id in self.tasks:
- task = self.tasks[task_id]
- del self.tasks[task_id]
+ task = self.get_task(task_id=task_id, name=name)
+ if task is None:
+ return False
+ tasks = dict(self.tasks)
+ del tasks[task.task_id]
+ self._publish_tasks(tasks)
+
+ self._untrack_task(task)
  self.logger.log_task_removed(task.name)
 
  # Remove from OS scheduler if registered
@@ -441,22 +1043,28 @@ class AutoCron:
  self.logger.warning(f"Failed to remove OS task: {e}")
 
  return True
- elif name:
- for tid, task in list(self.tasks.items()):
- if task.name == name:
- del self.tasks[tid]
- self.logger.log_task_removed(name)
 
- # Remove from OS scheduler if registered
+ def clear_tasks(self) -> int:
+ """
+ Remove all tasks from the scheduler.
+
+ Returns:
+ Number of tasks removed
+ """
+ with self._lock:
+ removed = list(self.tasks.values())
+ self._publish_tasks({})
+
+ for task in removed:
+ self._untrack_task(task)
  if self.use_os_scheduler and self.os_adapter:
  try:
- self.os_adapter.remove_scheduled_task(name)
+ self.os_adapter.remove_scheduled_task(task.name)
  except Exception as e:
  self.logger.warning(f"Failed to remove OS task: {e}")
 
- return True
-
- return False
+ self.logger.info(f"Cleared {len(removed)} tasks")
+ return len(removed)
 
  def get_task(self, task_id: Optional[str] = None, name: Optional[str] = None) -> Optional[Task]:
  """
@@ -471,10 +1079,8 @@ class AutoCron:
  """
  if task_id:
  return self.tasks.get(task_id)
- elif name:
- for task in self.tasks.values():
- if task.name == name:
- return task
+ elif name and (found_id := self._task_names.get(name)):
+ return self.tasks.get(found_id)
  return None
 
  def list_tasks(self) -> List[Task]:
@@ -534,32 +1140,22 @@ class AutoCron:
  "Only script-based tasks can be persisted."
  )
 
- # Save based on file extension
- if path_obj.suffix.lower() in {".yaml", ".yml"}:
- import yaml
-
- with open(path, "w") as f:
- yaml.dump(
- {
+ document = {
  "version": "1.0",
  "saved_at": datetime.now().isoformat(),
  "tasks": tasks_data,
- },
- f,
- default_flow_style=False,
- sort_keys=False,
- )
+ }
+
+ # Save based on file extension, using the C emitters when available
+ if path_obj.suffix.lower() in {".yaml", ".yml"}:
+ with open(path, "w", encoding="utf-8") as f:
+ _yaml_dump(document, f)
  elif path_obj.suffix.lower() == ".json":
+ if ORJSON_AVAILABLE:
+ path_obj.write_bytes(orjson.dumps(document, option=orjson.OPT_INDENT_2))
+ else:
  with open(path, "w") as f:
- json.dump(
- {
- "version": "1.0",
- "saved_at": datetime.now().isoformat(),
- "tasks": tasks_data,
- },
- f,
- indent=2,
- )
+ json.dump(document, f, indent=2)
  else:
  raise SchedulingError(
  f"Unsupported file format: {path_obj.suffix}. " "Use .yaml, .yml, or .json"
@@ -605,11 +1201,12 @@ class AutoCron:
 
  # Load based on file extension
  if path_obj.suffix.lower() in {".yaml", ".yml"}:
- import yaml
-
- with open(path, "r") as f:
- data = yaml.safe_load(f)
+ with open(path, "rb") as f:
+ data = _yaml_load(f)
  elif path_obj.suffix.lower() == ".json":
+ if ORJSON_AVAILABLE:
+ data = orjson.loads(path_obj.read_bytes())
+ else:
  with open(path, "r") as f:
  data = json.load(f)
  else:
@@ -621,39 +1218,49 @@ class AutoCron:
  if not isinstance(data, dict) or "tasks" not in data:
  raise SchedulingError("Invalid task file format")
 
- # Replace existing tasks if requested
- if replace:
- old_count = len(self.tasks)
- self.tasks.clear()
- self.logger.info(f"Cleared {old_count} existing tasks")
-
- # Load tasks
- loaded_count = 0
+ # Parse tasks
+ parsed: List[Task] = []
  skipped_count = 0
 
  for task_data in data["tasks"]:
  try:
- task = Task.from_dict(task_data)
+ parsed.append(Task.from_dict(task_data))
+ except Exception as e:
+ self.logger.error(f"Failed to load task: {e}")
+ skipped_count += 1
 
+ # Build the new task table and publish it in one assignment
+ with self._lock:
+ removed = list(self.tasks.values()) if replace else []
+ tasks = {} if replace else dict(self.tasks)
+ names = set() if replace else set(self._task_names)
+ loaded: List[Task] = []
+
+ for task in parsed:
  # Check for duplicate names
- existing_task = self.get_task(name=task.name)
- if existing_task and not replace:
+ if not replace and task.name in names:
  self.logger.warning(f"Task '{task.name}' already exists, skipping")
  skipped_count += 1
  continue
 
- # Add task
- self.tasks[task.task_id] = task
- loaded_count += 1
+ tasks[task.task_id] = task
+ names.add(task.name)
+ loaded.append(task)
 
- except Exception as e:
- self.logger.error(f"Failed to load task: {e}")
- skipped_count += 1
+ self._publish_tasks(tasks)
+
+ if replace:
+ for task in removed:
+ self._untrack_task(task)
+ self.logger.info(f"Cleared {len(removed)} existing tasks")
+
+ for task in loaded:
+ self._track_task(task)
 
  self.logger.info(
- f"Loaded {loaded_count} tasks from {path} " f"(skipped {skipped_count})"
+ f"Loaded {len(loaded)} tasks from {path} " f"(skipped {skipped_count})"
  )
- return loaded_count
+ return len(loaded)
 
  except SchedulingError:
  raise
@@ -672,6 +1279,7 @@ class AutoCron:
  return
 
  self._running = True
+ self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="autocron")
  self.logger.log_scheduler_start()
 
  if blocking:
@@ -686,50 +1294,209 @@ class AutoCron:
  return
 
  self._running = False
+ self._wake.set()
  self.logger.log_scheduler_stop()
 
  # Wait for main thread
  if self._thread and self._thread.is_alive():
  self._thread.join(timeout=5)
 
- # Wait for executor threads
- for thread in self._executor_threads:
- if thread.is_alive():
- thread.join(timeout=5)
+ # Wait for running tasks and drop those still waiting for a worker
+ if self._pool is not None:
+ self._pool.shutdown(wait=True, cancel_futures=True)
+ self._pool = None
+
+ self._stop_async_loop()
+
+ def _publish_tasks(self, tasks: Dict[str, Task]) -> None:
+ """Replace the task table and its name index (caller holds _lock)."""
+ names: Dict[str, str] = {}
+ for task_id, task in tasks.items():
+ names.setdefault(task.name, task_id)
+ self.tasks = tasks
+ self._task_names = names
+
+ def _track_task(self, task: Task) -> None:
+ """Start requeueing a task whenever its schedule changes."""
+ task._on_reschedule = self._schedule_task
+ self._schedule_task(task)
+
+ def _untrack_task(self, task: Task) -> None:
+ """Stop scheduling a removed task; its heap entries become stale."""
+ task._on_reschedule = None
+ # No wake-up needed: the loop applies the removal before popping any entry
+ self._commands.put((task.task_id, None, None))
+
+ def _schedule_task(self, task: Task, at: Optional[float] = None) -> None:
+ """
+ Ask the main loop to (re)schedule a task.
+
+ The loop is only woken when the new deadline precedes the one it is
+ sleeping until; later changes are picked up when it next wakes.
+
+ Args:
+ task: Task to schedule
+ at: time.monotonic() deadline to run at. Defaults to the task's next_run.
+ """
+ self._commands.put((task.task_id, task, at))
+ if at is None and task._enabled:
+ at = task._next_run_mono
+ if at is not None and at < self._next_wake:
+ self._next_wake = at
+ self._wake.set()
+
+ def _apply_commands(self) -> None:
+ """Apply queued schedule changes to the run heap (loop thread only)."""
+ while True:
+ try:
+ task_id, task, at = self._commands.get_nowait()
+ except queue.Empty:
+ break
+
+ if task is None:
+ self._tokens.pop(task_id, None)
+ continue
+
+ # Tokens are never reused, so entries left by a removed task stay stale
+ # even if a task with the same id is added again
+ token = next(self._token_counter)
+ self._tokens[task_id] = token
+ if at is None:
+ # Plain attributes rather than the public properties: this runs per reschedule
+ if not task._enabled or task._next_run_mono is None:
+ continue
+ at = task._next_run_mono
+ heapq.heappush(self._heap, (at, task_id, token))
+
+ # Rescheduled and removed tasks leave stale entries behind; drop them once
+ # they outnumber the live ones so the heap stays proportional to the tasks
+ if len(self._heap) > 2 * len(self._tokens) + self.HEAP_SLACK:
+ self._heap = [entry for entry in self._heap if self._tokens.get(entry[1]) == entry[2]]
+ heapq.heapify(self._heap)
+
+ def _pop_due_tasks(self) -> Tuple[List[Task], Optional[float]]:
+ """
+ Pop every task whose deadline has passed.
+
+ Returns:
+ Due tasks and the number of seconds until the next deadline
+ (None when nothing is scheduled)
+ """
+ self._apply_commands()
+
+ offset = time.time() - time.monotonic()
+ if offset - self._clock_offset > self.CLOCK_JUMP_TOLERANCE:
+ self._resync_deadlines()
+ self._clock_offset = offset
+
+ due: List[Task] = []
+ heap, tokens, tasks = self._heap, self._tokens, self.tasks
+ now = time.monotonic()
+ while heap:
+ at, task_id, token = heap[0]
+ if tokens.get(task_id) != token:
+ heapq.heappop(heap)
+ continue
+ if at > now:
+ return due, at - now
+ heapq.heappop(heap)
+ if task := tasks.get(task_id):
+ due.append(task)
+ return due, None
+
+ def _resync_deadlines(self) -> None:
+ """
+ Re-derive heap deadlines from each task's wall-clock next_run (loop thread only).
+
+ Called when the wall clock moved ahead of the monotonic clock, as after a
+ suspend, so tasks whose next_run passed meanwhile become due.
+ """
+ now_mono, now_wall = time.monotonic(), time.time()
+ tasks, tokens = self.tasks, self._tokens
+ heap = []
+ for at, task_id, token in self._heap:
+ if tokens.get(task_id) != token:
+ continue
+ task = tasks.get(task_id)
+ # Entries with an explicit deadline (dispatch retries) are left as they are
+ if task is not None:
+ with task._lock:
+ if task._next_run is not None and at == task._next_run_mono:
+ at = now_mono + (task._next_run.timestamp() - now_wall)
+ task._next_run_mono = at
+ heap.append((at, task_id, token))
+ heapq.heapify(heap)
+ self._heap = heap
 
  def _run(self) -> None:
- """Main scheduler loop."""
+ """Main scheduler loop, sleeping until the earliest task deadline."""
  while self._running:
  try:
- # Check for tasks to run
- tasks_to_run: List[Task] = []
+ # Reset and clear before checking so a wake-up during dispatch is not lost
+ self._next_wake = math.inf
+ self._wake.clear()
+ due, delay = self._pop_due_tasks()
 
- with self._lock:
- tasks_to_run.extend(task for task in self.tasks.values() if task.should_run())
- # Execute tasks
- for task in tasks_to_run:
- self._execute_task_async(task)
+ # Execute tasks; a task is requeued when its next_run is updated
+ for task in due:
+ if not self._execute_task_async(task):
+ self._schedule_task(task, at=time.monotonic() + 1)
 
- # Sleep briefly
- time.sleep(1)
+ if due:
+ continue
+ if delay is not None:
+ self._next_wake = time.monotonic() + delay
+ self._wake.wait(self.MAX_WAIT if delay is None else min(delay, self.MAX_WAIT))
 
  except Exception as e:
  self.logger.exception(f"Error in scheduler loop: {e}")
  time.sleep(5)
 
- def _execute_task_async(self, task: Task) -> None:
- """Execute task asynchronously."""
- # Clean up finished threads
- self._executor_threads = [t for t in self._executor_threads if t.is_alive()]
+ def _execute_task_async(self, task: Task) -> bool:
+ """
+ Execute task asynchronously.
+
+ Returns:
+ True if the task was submitted, False if the worker queue is full
+ """
+ pool = self._pool
+ if pool is None:
+ return False
 
- # Check worker limit
- if len(self._executor_threads) >= self.max_workers:
+ if not self._run_slots.acquire(blocking=False):
  self.logger.warning(f"Max workers reached, skipping task '{task.name}'")
+ return False
+
+ try:
+ future = pool.submit(self._execute_task, task)
+ except RuntimeError:
+ # Pool shut down by a concurrent stop()
+ self._run_slots.release()
+ return False
+
+ future.add_done_callback(partial(self._release_run_slot, task))
+ return True
+
+ def _release_run_slot(self, task: Task, future: Future) -> None:
+ """Free the queue slot held by a finished or cancelled run."""
+ self._run_slots.release()
+ if future.cancelled():
+ # Dropped by stop() before it started: the task was already popped from the
+ # heap and never reached complete_run, so requeue it for the next start()
+ self._schedule_task(task)
  return
 
- thread = threading.Thread(target=self._execute_task, args=(task,), daemon=True)
- thread.start()
- self._executor_threads.append(thread)
+ error = future.exception()
+ if error is None:
+ return
+ # Escaped _execute_task (e.g. SystemExit from the task, or complete_run failing),
+ # so nothing rescheduled the task; record the failed run to requeue it
+ self.logger.error(f"Task '{task.name}' aborted: {error!r}")
+ try:
+ task.complete_run(success=False)
+ except Exception as e:
+ self.logger.error(f"Failed to reschedule task '{task.name}': {e}")
+ self._schedule_task(task, at=time.monotonic() + self.MAX_WAIT)
 
  def _execute_task(self, task: Task) -> None:
  # sourcery skip: low-code-quality
@@ -745,7 +1512,7 @@ class AutoCron:
 
  # Execute task
  if task.func:
- self._execute_function(task.func, task.timeout)
+ self._execute_function(task.func, task.timeout, task._is_coroutine)
  elif task.safe_mode and task.script:
  self._execute_in_safe_mode(
  task.script, task.timeout, task.max_memory_mb, task.max_cpu_percent
@@ -758,8 +1525,7 @@ class AutoCron:
  final_attempt = attempt
 
  # Task succeeded
- task.increment_run_count()
- task.update_next_run()
+ task.complete_run(success=True)
 
  self.logger.log_task_success(task.name, task.task_id, duration)
 
@@ -786,7 +1552,6 @@ class AutoCron:
  return
 
  except Exception as e:
- task.increment_fail_count()
  final_error = str(e)
  final_attempt = attempt
 
@@ -796,7 +1561,7 @@ class AutoCron:
 
  # Last attempt failed
  if attempt == task.retries:
- task.update_next_run()
+ task.complete_run(success=False)
 
  # Notifications
  if task.notify:
@@ -822,73 +1587,88 @@ class AutoCron:
  return
 
  # Retry with backoff
+ task.increment_fail_count()
  delay = calculate_retry_delay(attempt, task.retry_delay)
  self.logger.log_task_retry(task.name, task.task_id, attempt + 2, delay)
  time.sleep(delay)
 
- def _execute_function(self, func: Callable, timeout: Optional[int]) -> Any:
+ def _execute_function(
+ self, func: Callable, timeout: Optional[int], is_coroutine: Optional[bool] = None
+ ) -> Any:
  """Execute a function with timeout (supports both sync and async)."""
  # Check if function is async
- if inspect.iscoroutinefunction(func):
+ if _is_coroutine_function(func) if is_coroutine is None else is_coroutine:
  return self._execute_async_function(func, timeout)
 
  # Sync function execution
  if timeout is None:
  return func()
 
- # Execute with timeout using threading
- result: List[Any] = [None]
- exception: List[Optional[Exception]] = [None]
-
- def wrapper():
- try:
- result[0] = func()
- except Exception as e:
- exception[0] = e
-
- thread = threading.Thread(target=wrapper, daemon=True)
- thread.start()
- thread.join(timeout=timeout)
-
- if thread.is_alive():
+ # Execute with timeout on a reused daemon thread; a timed-out call keeps running there
+ future = self._sync_workers.submit(func)
+ done, _ = wait_futures([future], timeout=timeout)
+ if not done:
  raise TaskExecutionError(f"Task timed out after {timeout} seconds")
-
- if exception[0]:
- raise exception[0] # pylint: disable=raising-bad-type
-
- return result[0]
+ return future.result()
 
  def _execute_async_function(self, func: Callable, timeout: Optional[int]) -> Any:
- """Execute an async function with timeout."""
- try:
- # Try to get existing event loop
+ """Execute an async function with timeout on the shared event loop."""
+ future = asyncio.run_coroutine_threadsafe(func(), self._get_async_loop())
+ # Waiting rather than catching TimeoutError from result() keeps a TimeoutError
+ # raised by the task itself apart from the scheduler's own timeout
+ done, _ = wait_futures([future], timeout=timeout or None)
+ if not done:
+ # Cancels the coroutine on the loop; the worker does not wait for it to unwind
+ future.cancel()
+ raise TaskExecutionError(f"Async task timed out after {timeout} seconds")
+ return future.result()
+
+ def _get_async_loop(self) -> asyncio.AbstractEventLoop:
+ """Return the background event loop, starting it if needed."""
+ with self._async_loop_lock:
+ if self._async_loop is None:
+ loop = _new_event_loop()
+ self._async_thread = threading.Thread(
+ target=self._run_async_loop, args=(loop,), name="autocron-asyncio", daemon=True
+ )
+ self._async_thread.start()
+ self._async_loop = loop
+ # Stop the loop if the scheduler is collected without stop()
+ self._async_loop_stopper = weakref.finalize(
+ self, loop.call_soon_threadsafe, loop.stop
+ )
+ return self._async_loop
+
+ def _stop_async_loop(self) -> None:
+ """Stop the background event loop and wait for its thread."""
+ with self._async_loop_lock:
+ if self._async_loop is None:
+ return
+ if self._async_loop_stopper is not None:
+ self._async_loop_stopper()
+ if self._async_thread is not None:
+ self._async_thread.join(timeout=5)
+ self._async_loop = None
+ self._async_thread = None
+ self._async_loop_stopper = None
+
+ @staticmethod
+ def _run_async_loop(loop: asyncio.AbstractEventLoop) -> None:
+ """Run an event loop until stopped, then cancel leftovers and close it."""
+ asyncio.set_event_loop(loop)
  try:
- loop = asyncio.get_running_loop()
- # We're in an async context, use the existing loop
- if timeout:
- return loop.run_until_complete(asyncio.wait_for(func(), timeout=timeout))
- else:
- return loop.run_until_complete(func())
- except RuntimeError:
- # No running loop, create a new one
- if timeout:
- return asyncio.run(asyncio.wait_for(func(), timeout=timeout))
- else:
- return asyncio.run(func())
- except asyncio.TimeoutError as e:
- raise TaskExecutionError(f"Async task timed out after {timeout} seconds") from e
+ loop.run_forever()
+ finally:
+ pending = asyncio.all_tasks(loop)
+ for task in pending:
+ task.cancel()
+ loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+ loop.close()
 
  def _execute_script(self, script: str, timeout: Optional[int]) -> Any:
  """Execute a script with timeout."""
  try:
- # nosec B603 - Controlled execution of user-specified Python scripts
- result = subprocess.run(
- [sys.executable, script],
- capture_output=True,
- text=True,
- timeout=timeout,
- check=True,
- )
+ result = _run_captured([sys.executable, script], timeout)
  return result.stdout
  except subprocess.TimeoutExpired as e:
  raise TaskExecutionError(f"Script timed out after {timeout} seconds") from e
@@ -909,7 +1689,8 @@ class AutoCron:
 
  Safe mode features:
  - Subprocess isolation (no access to parent process)
- - Resource limits (memory, CPU) on Unix/Linux/Mac
+ - Resource limits (memory, CPU) on Unix/Linux/Mac, via a cgroup v2 group per
+ run on Linux when one can be created
  - Timeout enforcement
  - Output sanitization
  - Error containment
@@ -934,60 +1715,105 @@ class AutoCron:
 
  # Build safe command with resource monitoring
  cmd = [sys.executable, script]
- env = {**os.environ, "AUTOCRON_SAFE_MODE": "1"}
+ env = os.environ.copy()
+ env["AUTOCRON_SAFE_MODE"] = "1"
+ # One character past the limit is read back to tell whether output was cut
+ run = partial(
+ _run_captured, cmd, timeout, env=env, max_output=self.SAFE_MODE_OUTPUT_LIMIT + 1
+ )
 
  # Platform-specific safe execution
  if os.name != "nt": # Unix/Linux/Mac
  try:
  import resource
 
- def set_limits():
- """Set resource limits for subprocess."""
- with contextlib.suppress(Exception):
- # Memory limit
- if max_memory_mb:
+ limits = []
+ if max_memory_mb: # Memory limit
  max_memory_bytes = max_memory_mb * 1024 * 1024
- resource.setrlimit( # type: ignore[attr-defined]
- resource.RLIMIT_AS, # type: ignore[attr-defined]
- (max_memory_bytes, max_memory_bytes),
+ limits.append(
+ (resource.RLIMIT_AS, max_memory_bytes) # type: ignore[attr-defined]
+ )
+ if timeout: # CPU time limit (in seconds)
+ limits.append((resource.RLIMIT_CPU, timeout)) # type: ignore[attr-defined]
+
+ # CPU percent limit: restrict the script to that share of the usable cores
+ cpus = None
+ if max_cpu_percent and hasattr(os, "sched_setaffinity"):
+ usable = sorted(os.sched_getaffinity(0))
+ share = math.ceil(len(usable) * max_cpu_percent / 100)
+ cpus = usable[: max(1, min(len(usable), share))]
+
+ # With cgroup v2 the kernel enforces memory and CPU share for the whole
+ # process tree, leaving only the CPU time limit to rlimits
+ cgroup = None
+ if sys.platform.startswith("linux") and (max_memory_mb or max_cpu_percent):
+ cgroup = _create_run_cgroup(
+ max_memory_mb * 1024 * 1024 if max_memory_mb else None,
+ max_cpu_percent,
  )
+ if cgroup is not None:
+ limits = [limit for limit in limits if limit[0] != resource.RLIMIT_AS]
+ cpus = None
+
+ if hasattr(resource, "prlimit"):
+ # Set the limits on the child from the parent (Linux), which keeps
+ # preexec_fn unset so the child is spawned with vfork instead of fork
+ def apply_limits(pid: int) -> None:
+ """Set resource limits on the started subprocess."""
+ if cgroup is not None: # Failing here kills the subprocess
+ (cgroup / "cgroup.procs").write_text(str(pid))
+ for which, value in limits:
+ with contextlib.suppress(Exception):
+ resource.prlimit(pid, which, (value, value))
+ if cpus:
+ with contextlib.suppress(Exception):
+ os.sched_setaffinity(pid, cpus)
+
+ try:
+ result = run(on_spawn=apply_limits)
+ finally:
+ if cgroup is not None:
+ _remove_run_cgroup(cgroup)
+ else:
 
- # CPU time limit (in seconds)
- if timeout:
+ def set_limits():
+ """Set resource limits for subprocess."""
+ for which, value in limits:
+ with contextlib.suppress(Exception):
  resource.setrlimit( # type: ignore[attr-defined]
- resource.RLIMIT_CPU, # type: ignore[attr-defined]
- (timeout, timeout),
+ which, (value, value)
  )
+ if cpus:
+ with contextlib.suppress(Exception):
+ os.sched_setaffinity(0, cpus)
 
- result = subprocess.run(
- cmd,
- capture_output=True,
- text=True,
- timeout=timeout,
- check=True,
- preexec_fn=set_limits, # Apply resource limits
- env=env,
- )
+ result = run(preexec_fn=set_limits) # Apply resource limits
  except ImportError:
  # resource module not available, fall back to basic subprocess
- result = subprocess.run(
- cmd, capture_output=True, text=True, timeout=timeout, check=True, env=env
- )
+ result = run()
  else: # Windows - use job objects for resource limits
- result = subprocess.run(
- cmd,
- capture_output=True,
- text=True,
- timeout=timeout,
- check=True,
- creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
- env=env,
+
+ def assign_job(pid: int) -> None:
+ """Put the started subprocess into a job object enforcing the limits."""
+ try:
+ _windows_assign_to_job(
+ pid,
+ max_memory_mb * 1024 * 1024 if max_memory_mb else None,
+ timeout,
+ max_cpu_percent,
+ )
+ except OSError as e:
+ self.logger.warning(f"Safe mode: Could not apply resource limits: {e}")
+
+ result = run(
+ on_spawn=assign_job,
+ creationflags=subprocess.CREATE_NEW_PROCESS_GROUP, # type: ignore[attr-defined]
  )
 
  # Sanitize output (remove potential sensitive data markers)
  output = result.stdout
- if len(output) > 10000: # Limit output size
- output = output[:10000] + "\n... (output truncated)"
+ if len(output) > self.SAFE_MODE_OUTPUT_LIMIT: # Limit output size
+ output = output[: self.SAFE_MODE_OUTPUT_LIMIT] + "\n... (output truncated)"
 
  self.logger.info("Safe mode execution completed successfully")
  return output
@@ -1009,9 +1835,7 @@ class AutoCron:
 
  def _setup_task_notifications(self, task: Task) -> None:
  """Set up notifications for a task."""
- channels = [task.notify] if isinstance(task.notify, str) else (task.notify or [])
-
- for channel in channels:
+ for channel in task._notify_channels:
  if channel == "desktop":
  self.notification_manager.setup_desktop()
  elif channel == "email":
@@ -1025,14 +1849,12 @@ class AutoCron:
 
  def _notify_success(self, task: Task, duration: float) -> None:
  """Send success notification."""
- channels = [task.notify] if isinstance(task.notify, str) else task.notify
- self.notification_manager.notify_task_success(task.name, duration, channels)
+ self.notification_manager.notify_task_success(task.name, duration, task._notify_channels)
 
  def _notify_failure(self, task: Task, error: str, attempt: int) -> None:
  """Send failure notification."""
- channels = [task.notify] if isinstance(task.notify, str) else task.notify
  self.notification_manager.notify_task_failure(
- task.name, error, attempt, task.retries + 1, channels
+ task.name, error, attempt, task.retries + 1, task._notify_channels
  )
 
  def _register_os_task(self, task: Task) -> None:
@@ -1061,18 +1883,7 @@ class AutoCron:
 
  def _interval_to_cron(self, interval: str) -> str:
  """Convert interval to cron expression (simplified)."""
- seconds = parse_interval(interval)
-
- if seconds < 60:
- return f"*/{seconds} * * * * *"
- elif seconds < 3600:
- minutes = seconds // 60
- return f"*/{minutes} * * * *"
- elif seconds < 86400:
- hours = seconds // 3600
- return f"0 */{hours} * * *"
- else:
- return "0 0 * * *"
+ return _cron_for_interval(interval)
 
  @classmethod
  def from_config(cls, config_path: str) -> "AutoCron":
@@ -1085,10 +1896,8 @@ class AutoCron:
  Returns:
  AutoCron instance
  """
- import yaml
-
- with open(config_path, "r") as f:
- config = yaml.safe_load(f)
+ with open(config_path, "rb") as f:
+ config = _yaml_load(f)
 
  # Create scheduler
  logging_config = config.get("logging", {})
@@ -1098,17 +1907,13 @@ class AutoCron:
 
  # Add tasks
  for task_config in config.get("tasks", []):
+ schedule_value = task_config.get("schedule")
+ is_cron = "/" in (schedule_value or "")
  scheduler.add_task(
  name=task_config["name"],
  script=task_config.get("script"),
- every=(
- task_config.get("schedule")
- if "/" not in task_config.get("schedule", "")
- else None
- ),
- cron=(
- task_config.get("schedule") if "/" in task_config.get("schedule", "") else None
- ),
+ every=None if is_cron else schedule_value,
+ cron=schedule_value if is_cron else None,
  retries=task_config.get("retries", 0),
  notify=task_config.get("notify"),
  email_config=task_config.get("email"),
@@ -8,8 +8,13 @@ and general utilities used throughout the library.
 import platform
 import re
 import sys
+import threading
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+ from croniter import croniter
 
 
 class TimeParseError(Exception):
@@ -18,6 +23,16 @@ class TimeParseError(Exception):
  pass
 
 
+_INTERVAL_PATTERN = re.compile(r"^(\d+)([smhd])$")
+_INTERVAL_MULTIPLIERS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Every character croniter can accept: field values, names, L/W/#/? and @aliases
+_CRON_CHARS = re.compile(r"^[A-Za-z0-9*?#@/,\-\s]+$")
+_CRON_ALIASES = frozenset(
+ {"@yearly", "@annually", "@monthly", "@weekly", "@daily", "@midnight", "@hourly"}
+)
+
+
+@lru_cache(maxsize=512)
 def parse_interval(interval: str) -> int:
  """
  Parse interval string to seconds.
@@ -41,8 +56,7 @@ def parse_interval(interval: str) -> int:
  >>> parse_interval('2h')
  7200
  """
- pattern = r"^(\d+)([smhd])$"
- match = re.match(pattern, interval.lower().strip())
+ match = _INTERVAL_PATTERN.match(interval.lower().strip())
 
  if not match:
  raise TimeParseError(
@@ -50,11 +64,8 @@ def parse_interval(interval: str) -> int:
  )
 
  value, unit = match.groups()
- value = int(value)
 
- multipliers = {"s": 1, "m": 60, "h": 3600, "d": 86400}
-
- return value * multipliers[unit]
+ return int(value) * _INTERVAL_MULTIPLIERS[unit]
 
 
 def validate_cron_expression(cron_expr: str) -> bool:
@@ -73,6 +84,17 @@ def validate_cron_expression(cron_expr: str) -> bool:
  >>> validate_cron_expression('invalid')
  False
  """
+ # Reject non-strings and stray characters before paying for a croniter parse
+ if not isinstance(cron_expr, str) or not _CRON_CHARS.match(cron_expr):
+ return False
+ if cron_expr in _CRON_ALIASES:
+ return True
+ return _is_valid_cron(cron_expr)
+
+
+@lru_cache(maxsize=512)
+def _is_valid_cron(cron_expr: str) -> bool:
+ """Check a cron expression with croniter, cached per string."""
  try:
  # Import here to avoid circular dependency
  from croniter import croniter
@@ -176,6 +198,18 @@ def sanitize_task_name(name: str) -> str:
  return sanitized.strip("_")
 
 
+@lru_cache(maxsize=512)
+def _compiled_cron(cron_expr: str) -> Tuple["croniter", threading.Lock]:
+ """Parse a cron expression once and share it between callers.
+
+ croniter instances carry iteration state, so each one comes with a lock
+ that callers hold while computing a fire time from it.
+ """
+ from croniter import croniter
+
+ return croniter(cron_expr, datetime.now()), threading.Lock()
+
+
 def get_next_run_time(cron_expr: str, base_time: Optional[datetime] = None) -> datetime:
  """
  Get next run time for a cron expression.
@@ -196,8 +230,13 @@ def get_next_run_time(cron_expr: str, base_time: Optional[datetime] = None) -> d
  if base_time is None:
  base_time = datetime.now()
 
- cron = croniter(cron_expr, base_time)
- return cron.get_next(datetime)
+ if base_time.tzinfo is not None:
+ # The shared parsers are built for naive local times
+ return croniter(cron_expr, base_time).get_next(datetime)
+
+ cron, lock = _compiled_cron(cron_expr)
+ with lock:
+ return cron.get_next(datetime, start_time=base_time)
  except Exception as e:
  raise TimeParseError(f"Invalid cron expression '{cron_expr}': {str(e)}") from e
 
@@ -253,11 +292,18 @@ class SingletonMeta(type):
  """
 
  _instances: Dict[type, Any] = {}
+ # Reentrant so a singleton's __init__ can create another singleton
+ _lock = threading.RLock()
 
  def __call__(cls, *args, **kwargs): # type: ignore
- if cls not in cls._instances:
- cls._instances[cls] = super().__call__(*args, **kwargs)
- return cls._instances[cls]
+ # Double-checked: existing instances are returned without taking the lock
+ instance = cls._instances.get(cls)
+ if instance is None:
+ with cls._lock:
+ instance = cls._instances.get(cls)
+ if instance is None:
+ instance = cls._instances[cls] = super().__call__(*args, **kwargs)
+ return instance
 
 
 def ensure_directory(path: str) -> None:
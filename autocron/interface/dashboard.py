@@ -6,10 +6,20 @@ execution statistics, history, and performance metrics with rich formatting.
 """
 
 import contextlib
+import hashlib
 import json
-from datetime import datetime, timedelta
+import mmap
+import os
+import queue
+import threading
+import time
+import weakref
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Tuple
 
 try:
  from rich import box
@@ -24,9 +34,413 @@ except ImportError:
  if TYPE_CHECKING:
  from rich.table import Table
 
+try:
+ import orjson
+
+ ORJSON_AVAILABLE = True
+except ImportError:
+ ORJSON_AVAILABLE = False
+
+
+def _json_default(obj: Any) -> Any:
+ """Serialize history deques and records as JSON types, anything else as a string."""
+ if isinstance(obj, deque):
+ return list(obj)
+ if isinstance(obj, ExecutionRecord):
+ return obj.to_dict()
+ return str(obj)
+
+
+# Status icons for success rates below 80%, below 95%, and 95% or higher
+_STATUS_THRESHOLDS = (80, 95)
+_STATUS_ICONS = ("", "️", "")
+
+
+def _status_icon(success_rate: float) -> str:
+ """Return the status icon for a task success rate."""
+ return _STATUS_ICONS[bisect_right(_STATUS_THRESHOLDS, success_rate)]
+
+
+def _iso_to_epoch(value: Optional[str]) -> Optional[float]:
+ """Convert an ISO timestamp string to epoch seconds."""
+ return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def _epoch_to_iso(value: Optional[float]) -> Optional[str]:
+ """Convert epoch seconds to a local ISO timestamp string."""
+ return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+
+class ExecutionRecord:
+ """A single task execution kept in analytics history.
+
+ Records are stored as slotted objects rather than dicts to keep the
+ per-execution allocation small; they are converted to dicts only when
+ written to disk or returned from ``get_task_stats``.
+ """
+
+ __slots__ = ("timestamp", "success", "duration", "error", "retry_count")
+
+ def __init__(
+ self,
+ timestamp: float,
+ success: bool,
+ duration: float,
+ error: Optional[str] = None,
+ retry_count: int = 0,
+ ):
+ """Initialize an execution record.
+
+ Args:
+ timestamp: Execution time in seconds since the epoch
+ success: Whether the execution succeeded
+ duration: Execution duration in seconds
+ error: Error message if execution failed
+ retry_count: Number of retries attempted
+ """
+ self.timestamp = timestamp
+ self.success = success
+ self.duration = duration
+ self.error = error
+ self.retry_count = retry_count
+
+ def to_dict(self) -> Dict[str, Any]:
+ """Convert the record to a dictionary for serialization."""
+ return {
+ "timestamp": _epoch_to_iso(self.timestamp),
+ "timestamp_epoch": self.timestamp,
+ "success": self.success,
+ "duration": self.duration,
+ "error": self.error,
+ "retry_count": self.retry_count,
+ }
+
+ @classmethod
+ def from_dict(cls, data: Dict[str, Any]) -> "ExecutionRecord":
+ """Create a record from a dictionary, including ones without an epoch field."""
+ timestamp = data.get("timestamp_epoch")
+ if timestamp is None:
+ timestamp = _iso_to_epoch(data["timestamp"])
+ return cls(
+ timestamp=timestamp,
+ success=data["success"],
+ duration=data["duration"],
+ error=data.get("error"),
+ retry_count=data.get("retry_count", 0),
+ )
+
+
+# A journaled execution: the task name and its record
+_JournalEntry = Tuple[str, ExecutionRecord]
+# A batch handed to the writer: the compaction generation it left the buffer in, and its entries
+_JournalBatch = Tuple[int, List[_JournalEntry]]
+
+
+def _read_json(path: Path) -> Any:
+ """Parse a JSON file straight from a read-only memory map of it."""
+ with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+ if ORJSON_AVAILABLE:
+ with memoryview(mm) as view:
+ return orjson.loads(view)
+ return json.loads(mm[:])
+
+
+def _dumps_compact(data: Dict[str, Any]) -> bytes:
+ """Serialize data to compact JSON bytes, using orjson when installed."""
+ if ORJSON_AVAILABLE:
+ return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+ return json.dumps(data, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _dumps_pretty(data: Any) -> bytes:
+ """Serialize data to indented JSON bytes, using orjson when installed."""
+ if ORJSON_AVAILABLE:
+ return orjson.dumps(
+ data, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+ )
+ return json.dumps(data, indent=2, default=_json_default).encode("utf-8")
+
+
+def _write_bytes_atomic(path: Path, payload: bytes) -> None:
+ """Write bytes to a temporary file and atomically move it into place.
+
+ Raises:
+ OSError: If the file could not be written or replaced
+ """
+ tmp_path = path.with_name(path.name + ".tmp")
+ tmp_path.write_bytes(payload)
+ os.replace(tmp_path, path)
+
+
+def _append_entries(path: Path, entries: List[_JournalEntry]) -> None:
+ """Append journal entries to a file as JSON lines.
+
+ Raises:
+ OSError: If the journal could not be written
+ """
+ payload = b"".join(
+ _dumps_compact({"task": task_name, **record.to_dict()}) + b"\n"
+ for task_name, record in entries
+ )
+ with open(path, "ab") as f:
+ f.write(payload)
+
+
+def _log_storage_problem(message: str) -> None:
+ """Report an analytics storage problem through the AutoCron logger."""
+ from autocron.logging.logger import get_logger
+
+ get_logger().warning(message)
+
+
+# Queue markers understood by _JournalWriter besides batches of journal entries
+_COMPACT = object()
+_STOP = object()
+
+
+class _JournalWriter:
+ """Background thread that appends journal batches and compacts the snapshot.
+
+ The writer shares the analytics data, its lock and the pending-entry buffer
+ with its TaskAnalytics instance but holds no reference to the instance
+ itself, so the instance can still be garbage collected and flushed.
+ """
+
+ QUEUE_SIZE = 1024
+ BATCH_LIMIT = 64
+ RETRY_INITIAL_DELAY = 0.5
+ RETRY_MAX_DELAY = 60.0
+ # Failed entries kept for retry; the oldest are dropped beyond this
+ FAILED_LIMIT = 10_000
+
+ def __init__(
+ self,
+ storage_path: Path,
+ journal_path: Path,
+ data: Dict[str, Any],
+ lock: threading.Lock,
+ pending: List[_JournalEntry],
+ ):
+ self.storage_path = storage_path
+ self.journal_path = journal_path
+ self.data = data
+ self.lock = lock
+ self.pending = pending
+ self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.QUEUE_SIZE)
+ # Bumped under the lock whenever a compaction snapshots the data; batches
+ # taken from the buffer before that are part of the snapshot
+ self.generation = 0
+ # Batches from generations below this are in the snapshot on disk
+ self._snapshot_generation = 0
+ self._thread: Optional[threading.Thread] = None
+ # Digest of the last snapshot written, used to skip identical rewrites
+ self._snapshot_digest: Optional[bytes] = None
+ # Entries whose write failed, retried with exponential backoff
+ self._failed: Deque[_JournalEntry] = deque(maxlen=self.FAILED_LIMIT)
+ self._retry_delay = self.RETRY_INITIAL_DELAY
+
+ @property
+ def degraded(self) -> bool:
+ """Whether journal writes are currently failing and being retried."""
+ return bool(self._failed)
+
+ def submit(self, item: Any, timeout: Optional[float] = None) -> bool:
+ """Queue a batch or marker, starting the thread on first use.
+
+ Returns:
+ False if the queue stayed full for the whole timeout
+ """
+ if self._thread is None:
+ self._thread = threading.Thread(
+ target=self._run, name="autocron-analytics-writer", daemon=True
+ )
+ self._thread.start()
+ try:
+ self.queue.put(item, timeout=timeout)
+ except queue.Full:
+ return False
+ return True
+
+ def wait(self) -> None:
+ """Block until every queued item has been processed."""
+ self.queue.join()
+
+ def close(self) -> None:
+ """Drain the queue, stop the thread and write any remaining pending entries."""
+ if self._thread is not None and self._thread.is_alive():
+ self.queue.put(_STOP)
+ self._thread.join()
+ with self.lock:
+ entries = list(self.pending)
+ self.pending.clear()
+ self._write(entries)
+ if self._failed:
+ _log_storage_problem(
+ f"Dropping {len(self._failed)} analytics records that could not be written"
+ )
+ self._failed.clear()
+
+ def _write(self, entries: List[_JournalEntry]) -> None:
+ """Append entries after any earlier failed ones, keeping them for retry on error."""
+ if not entries and not self._failed:
+ return
+ try:
+ _append_entries(self.journal_path, [*self._failed, *entries])
+ except OSError as e:
+ if self._failed:
+ self._retry_delay = min(self._retry_delay * 2, self.RETRY_MAX_DELAY)
+ else:
+ _log_storage_problem(f"Analytics journal write failed, will retry: {e}")
+ dropped = len(self._failed) + len(entries) - self.FAILED_LIMIT
+ if dropped > 0:
+ _log_storage_problem(
+ f"Dropping {dropped} oldest analytics records while journal writes fail"
+ )
+ self._failed.extend(entries)
+ return
+ if self._failed:
+ _log_storage_problem("Analytics journal writes recovered")
+ self._failed.clear()
+ self._retry_delay = self.RETRY_INITIAL_DELAY
+
+ def _run(self) -> None:
+ """Write queued batches until a stop marker arrives."""
+ while True:
+ try:
+ # Wake up on our own to retry failed writes
+ items = [self.queue.get(timeout=self._retry_delay if self._failed else None)]
+ except queue.Empty:
+ items = []
+ while len(items) < self.BATCH_LIMIT:
+ try:
+ items.append(self.queue.get_nowait())
+ except queue.Empty:
+ break
+
+ stop = False
+ entries: List[_JournalEntry] = []
+ try:
+ for index, item in enumerate(items):
+ if item is _STOP:
+ stop = True
+ elif item is _COMPACT:
+ # Everything still unwritten is already part of the snapshot
+ stop_queued = self._compact(entries + self._entries_in(items[index + 1 :]))
+ entries = []
+ stop = stop or stop_queued or _STOP in items[index + 1 :]
+ break
+ else:
+ entries.extend(self._entries_in([item]))
+ self._write(entries)
+ finally:
+ for _ in items:
+ self.queue.task_done()
+ if stop:
+ return
+
+ def _entries_in(self, items: List[Any]) -> List[_JournalEntry]:
+ """Collect journal entries from queue items, skipping markers.
+
+ A batch can reach the queue after a compaction that already folded its
+ entries into the snapshot; those are skipped too.
+ """
+ return [
+ entry
+ for item in items
+ if isinstance(item, tuple) and item[0] >= self._snapshot_generation
+ for entry in item[1]
+ ]
+
+ def _compact(self, unwritten: List[_JournalEntry]) -> bool:
+ """Rewrite the snapshot from memory and truncate the journal.
+
+ Returns:
+ Whether a stop marker was among the queued items drained meanwhile
+ """
+ stop = False
+ with self.lock:
+ payload = _dumps_compact(self.data)
+ generation = self.generation
+ self.generation += 1
+ # Records queued, buffered or awaiting retry were applied before this snapshot
+ discarded = [*self._failed, *unwritten, *self.pending]
+ self._failed.clear()
+ self.pending.clear()
+ while True:
+ try:
+ item = self.queue.get_nowait()
+ except queue.Empty:
+ break
+ if isinstance(item, tuple):
+ discarded.extend(item[1])
+ elif item is _STOP:
+ stop = True
+ self.queue.task_done()
+
+ digest = hashlib.blake2b(payload, digest_size=16).digest()
+ if digest != self._snapshot_digest:
+ try:
+ _write_bytes_atomic(self.storage_path, payload)
+ except OSError as e:
+ _log_storage_problem(f"Analytics snapshot write failed: {e}")
+ # Keep the journal complete since the snapshot could not be written
+ self._write(discarded)
+ return stop
+ self._snapshot_digest = digest
+ self._snapshot_generation = generation + 1
+
+ try:
+ open(self.journal_path, "wb").close()
+ except OSError as e:
+ _log_storage_problem(f"Analytics journal could not be truncated: {e}")
+ return stop
+
+
+# (predicate, message template) pairs checked by TaskAnalytics.get_recommendations.
+# Templates are formatted with the task stats only when their predicate matches.
+_RECOMMENDATION_RULES: Tuple[Tuple[Callable[[Dict[str, Any]], bool], str], ...] = (
+ (
+ lambda stats: stats["success_rate"] < 80,
+ "️ Low success rate ({success_rate:.1f}%). "
+ "Consider adding error handling or increasing retry attempts.",
+ ),
+ (
+ lambda stats: stats["avg_retries"] > 0.5,
+ " High retry rate ({avg_retries:.1f} per run). "
+ "The task may be failing frequently. Check error logs.",
+ ),
+ (
+ lambda stats: stats["avg_duration"] > 300, # 5 minutes
+ "⏱️ Long average duration ({avg_duration:.1f}s). "
+ "Consider optimizing the task or running it less frequently.",
+ ),
+ (
+ lambda stats: stats["recent_failures"] >= 3,
+ " Multiple recent failures detected. Check task implementation.",
+ ),
+)
+
 
 class TaskAnalytics:
- """Store and analyze task execution history."""
+ """Store and analyze task execution history.
+
+ Storage is a JSON snapshot plus an append-only journal next to it
+ (``analytics.ndjson`` for ``analytics.json``) holding one execution per
+ line. Executions are buffered in memory and handed to a background writer
+ thread in batches: a hand-off happens once ``FLUSH_THRESHOLD`` records are
+ pending or ``FLUSH_INTERVAL`` seconds have passed since the last one, so
+ callers never wait on disk I/O unless the writer falls behind. Pending
+ records are also written when the instance is garbage collected or the
+ interpreter exits. Once the journal holds ``COMPACT_THRESHOLD`` records
+ it is folded into a fresh snapshot and truncated.
+ """
+
+ FLUSH_THRESHOLD = 50
+ FLUSH_INTERVAL = 5.0
+ SUBMIT_TIMEOUT = 1.0
+ COMPACT_THRESHOLD = 10_000
+ HISTORY_SIZE = 100
+ RECENT_WINDOW = 5
 
  def __init__(self, storage_path: Optional[Path] = None):
  """Initialize task analytics storage.
@@ -39,42 +453,100 @@ class TaskAnalytics:
  storage_path = Path.home() / ".autocron" / "analytics.json"
 
  self.storage_path = Path(storage_path)
+ self.journal_path = self.storage_path.with_suffix(".ndjson")
  self.storage_path.parent.mkdir(parents=True, exist_ok=True)
- self._data: Dict[str, Dict[str, Any]] = self._load()
+ # Tasks are kept most recently run first, so listing them needs no sort
+ self._data: "OrderedDict[str, Dict[str, Any]]" = self._load()
+ self._journal_count = self._replay_journal()
+ # Whether memory holds executions the snapshot does not
+ self._dirty = self._journal_count > 0
+ self._pending: List[_JournalEntry] = []
+ self._last_flush_ts = time.monotonic()
+
+ # _lock guards the data and pending buffer; _submit_lock keeps batches in order
+ self._lock = threading.Lock()
+ self._submit_lock = threading.Lock()
+ self._writer = _JournalWriter(
+ self.storage_path, self.journal_path, self._data, self._lock, self._pending
+ )
+ # Drain the writer when the instance is collected or the interpreter exits
+ weakref.finalize(self, self._writer.close)
+
+ # Derived stats are cached until the next execution is recorded
+ self._version = 0
+ self._stats_cache: Dict[str, Dict[str, Any]] = {}
+ self._all_stats_cache: Optional[List[Dict[str, Any]]] = None
+
+ @property
+ def version(self) -> int:
+ """Counter incremented on every recorded execution."""
+ return self._version
 
- def _load(self) -> Dict[str, Dict[str, Any]]:
+ @property
+ def degraded(self) -> bool:
+ """Whether analytics writes are failing and being retried in the background."""
+ return self._writer.degraded
+
+ def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
  """Load analytics data from disk."""
  if self.storage_path.exists():
  try:
- with open(self.storage_path, "r") as f:
- return json.load(f)
- except (json.JSONDecodeError, IOError):
- return {}
- return {}
-
- def _save(self) -> None:
- """Save analytics data to disk."""
- with contextlib.suppress(IOError):
- with open(self.storage_path, "w") as f:
- json.dump(self._data, f, indent=2, default=str)
+ data = _read_json(self.storage_path)
+ except (ValueError, OSError):
+ # Corrupt, truncated or empty file (mmap refuses empty files)
+ return OrderedDict()
+ for task_data in data.values():
+ history = deque(
+ map(ExecutionRecord.from_dict, task_data.get("history", [])),
+ maxlen=self.HISTORY_SIZE,
+ )
+ task_data["history"] = history
+ # Parse timestamps from older files once so rendering never has to
+ for key in ("first_run", "last_run"):
+ iso_value = task_data.pop(key, None)
+ if f"{key}_epoch" not in task_data:
+ task_data[f"{key}_epoch"] = _iso_to_epoch(iso_value)
+ self._update_averages(task_data)
+ recent = islice(history, max(len(history) - self.RECENT_WINDOW, 0), None)
+ task_data["recent_failures"] = sum(not r.success for r in recent)
+ return OrderedDict(
+ sorted(data.items(), key=lambda item: item[1]["last_run_epoch"] or 0, reverse=True)
+ )
+ return OrderedDict()
 
- def record_execution(
- self,
- task_name: str,
- success: bool,
- duration: float,
- error: Optional[str] = None,
- retry_count: int = 0,
- ) -> None:
- """Record a task execution event.
+ @staticmethod
+ def _update_averages(task_data: Dict[str, Any]) -> None:
+ """Refresh the derived averages of a task from its running totals."""
+ total_runs = task_data["total_runs"]
+ if total_runs:
+ task_data["avg_duration"] = task_data["total_duration"] / total_runs
+ task_data["success_rate"] = (task_data["successful_runs"] / total_runs) * 100
+ task_data["avg_retries"] = task_data["total_retries"] / total_runs
 
- Args:
- task_name: Name of the executed task
- success: Whether the execution succeeded
- duration: Execution duration in seconds
- error: Error message if execution failed
- retry_count: Number of retries attempted
+ def _replay_journal(self) -> int:
+ """Apply journaled executions on top of the loaded snapshot.
+
+ Returns:
+ Number of journal records applied
  """
+ if not self.journal_path.exists():
+ return 0
+
+ count = 0
+ loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+ with contextlib.suppress(OSError), open(self.journal_path, "rb") as f:
+ for line in f:
+ try:
+ data = loads(line)
+ except ValueError:
+ # A torn final line from an interrupted write
+ continue
+ self._apply_record(data.pop("task"), ExecutionRecord.from_dict(data))
+ count += 1
+ return count
+
+ def _apply_record(self, task_name: str, record: ExecutionRecord) -> None:
+ """Fold a single execution record into the in-memory task data."""
  if task_name not in self._data:
  self._data[task_name] = {
  "total_runs": 0,
@@ -82,88 +554,226 @@ class TaskAnalytics:
  "failed_runs": 0,
  "total_duration": 0.0,
  "total_retries": 0,
- "history": [],
- "first_run": None,
- "last_run": None,
+ "recent_failures": 0,
+ "history": deque(maxlen=self.HISTORY_SIZE),
+ "first_run_epoch": None,
+ "last_run_epoch": None,
  }
 
  task_data = self._data[task_name]
  task_data["total_runs"] += 1
- task_data["total_duration"] += duration
- task_data["total_retries"] += retry_count
+ task_data["total_duration"] += record.duration
+ task_data["total_retries"] += record.retry_count
 
- if success:
+ if record.success:
  task_data["successful_runs"] += 1
  else:
  task_data["failed_runs"] += 1
 
- # Record history (keep last 100 executions)
- execution_record = {
- "timestamp": datetime.now().isoformat(),
- "success": success,
- "duration": duration,
- "error": error,
- "retry_count": retry_count,
- }
-
- task_data["history"].append(execution_record)
- task_data["history"] = task_data["history"][-100:] # Keep last 100
+ # Slide the recent-failures window before the oldest record is evicted
+ history = task_data["history"]
+ if len(history) >= self.RECENT_WINDOW and not history[-self.RECENT_WINDOW].success:
+ task_data["recent_failures"] -= 1
+ if not record.success:
+ task_data["recent_failures"] += 1
+ history.append(record)
+ self._update_averages(task_data)
 
  # Update timestamps
- if task_data["first_run"] is None:
- task_data["first_run"] = execution_record["timestamp"]
- task_data["last_run"] = execution_record["timestamp"]
+ if task_data["first_run_epoch"] is None:
+ task_data["first_run_epoch"] = record.timestamp
+ task_data["last_run_epoch"] = record.timestamp
 
- self._save()
+ self._data.move_to_end(task_name, last=False)
 
- def get_task_stats(self, task_name: str) -> Optional[Dict[str, Any]]:
- """Get statistics for a specific task.
+ def _submit_pending(self, timeout: Optional[float] = None) -> None:
+ """Hand the buffered journal entries to the writer thread.
 
  Args:
- task_name: Name of the task
-
- Returns:
- Dictionary of task statistics or None if task not found
+ timeout: Seconds to wait for room in the writer queue. On timeout
+ the entries stay buffered and are retried on the next hand-off,
+ unless a compaction that may hold them ran meanwhile.
  """
- if task_name not in self._data:
- return None
+ with self._submit_lock:
+ with self._lock:
+ batch = list(self._pending)
+ self._pending.clear()
+ generation = self._writer.generation
+ if not batch:
+ return
+ if not self._writer.submit((generation, batch), timeout=timeout):
+ with self._lock:
+ # A compaction since then may have put the batch in its snapshot
+ requeue = generation == self._writer.generation
+ if requeue:
+ self._pending[:0] = batch
+ if requeue:
+ return
+ # Only the writer knows whether that snapshot was written, so let it decide
+ if not self._writer.submit((generation, batch), timeout=timeout):
+ _log_storage_problem(
+ f"Analytics writer is stalled, dropping {len(batch)} records"
+ " that may already be in the snapshot"
+ )
+ return
 
- task_data = self._data[task_name]
- total_runs = task_data["total_runs"]
+ self._last_flush_ts = time.monotonic()
+ self._journal_count += len(batch)
+ if self._journal_count >= self.COMPACT_THRESHOLD:
+ # Left due on timeout, so the next hand-off asks again
+ self._request_compaction(timeout)
 
- if total_runs == 0:
- return None
+ def _request_compaction(self, timeout: Optional[float]) -> bool:
+ """Queue a compaction for the writer; call with ``_submit_lock`` held.
+
+ Args:
+ timeout: Seconds to wait for room in the writer queue
+
+ Returns:
+ False if the queue stayed full, leaving the compaction due
+ """
+ with self._lock:
+ self._dirty = False
+ if not self._writer.submit(_COMPACT, timeout=timeout):
+ with self._lock:
+ self._dirty = True
+ return False
+ self._journal_count = 0
+ return True
+
+ def flush(self) -> None:
+ """Write any buffered execution records to disk and wait for the writer."""
+ self._submit_pending()
+ self._writer.wait()
+
+ def compact(self) -> None:
+ """Rewrite the snapshot from memory and truncate the journal.
+
+ Does nothing when no execution was recorded since the last compaction.
+ """
+ with self._submit_lock:
+ with self._lock:
+ if not self._dirty:
+ return
+ if not self._request_compaction(self.SUBMIT_TIMEOUT):
+ _log_storage_problem("Analytics writer is stalled, compaction postponed")
+ return
+ self._writer.wait()
 
- avg_duration = task_data["total_duration"] / total_runs
- success_rate = (task_data["successful_runs"] / total_runs) * 100
+ def record_execution(
+ self,
+ task_name: str,
+ success: bool,
+ duration: float,
+ error: Optional[str] = None,
+ retry_count: int = 0,
+ ) -> None:
+ """Record a task execution event.
 
- # Get recent history
- recent_history = task_data["history"][-10:]
+ Args:
+ task_name: Name of the executed task
+ success: Whether the execution succeeded
+ duration: Execution duration in seconds
+ error: Error message if execution failed
+ retry_count: Number of retries attempted
+ """
+ # Record history (the deque keeps the last HISTORY_SIZE executions)
+ record = ExecutionRecord(time.time(), success, duration, error, retry_count)
+
+ with self._lock:
+ self._apply_record(task_name, record)
+ self._version += 1
+ self._stats_cache.pop(task_name, None)
+ self._all_stats_cache = None
+ self._pending.append((task_name, record))
+ self._dirty = True
+ due = (
+ len(self._pending) >= self.FLUSH_THRESHOLD
+ or time.monotonic() - self._last_flush_ts >= self.FLUSH_INTERVAL
+ )
 
+ if due:
+ # Block briefly when the writer falls behind rather than queueing without bound
+ self._submit_pending(timeout=self.SUBMIT_TIMEOUT)
+
+ @staticmethod
+ def _snapshot_task(
+ task_name: str, task_data: Dict[str, Any]
+ ) -> Tuple[str, Dict[str, Any], List[ExecutionRecord]]:
+ """Copy what the stats of a task are built from; call with ``_lock`` held."""
+ history = task_data["history"]
+ return task_name, dict(task_data), list(islice(history, max(len(history) - 10, 0), None))
+
+ @staticmethod
+ def _build_stats(
+ task_name: str, task_data: Dict[str, Any], recent: List[ExecutionRecord]
+ ) -> Dict[str, Any]:
+ """Derive the stats of a task from a copy taken by ``_snapshot_task``."""
  return {
  "task_name": task_name,
- "total_runs": total_runs,
+ "total_runs": task_data["total_runs"],
  "successful_runs": task_data["successful_runs"],
  "failed_runs": task_data["failed_runs"],
- "success_rate": success_rate,
- "avg_duration": avg_duration,
+ "success_rate": task_data["success_rate"],
+ "avg_duration": task_data["avg_duration"],
  "total_retries": task_data["total_retries"],
- "first_run": task_data["first_run"],
- "last_run": task_data["last_run"],
- "recent_history": recent_history,
+ "avg_retries": task_data["avg_retries"],
+ "recent_failures": task_data["recent_failures"],
+ "first_run": _epoch_to_iso(task_data["first_run_epoch"]),
+ "last_run": _epoch_to_iso(task_data["last_run_epoch"]),
+ "first_run_epoch": task_data["first_run_epoch"],
+ "last_run_epoch": task_data["last_run_epoch"],
+ "recent_history": [r.to_dict() for r in recent],
  }
 
+ def get_task_stats(self, task_name: str) -> Optional[Dict[str, Any]]:
+ """Get statistics for a specific task.
+
+ Args:
+ task_name: Name of the task
+
+ Returns:
+ Dictionary of task statistics or None if task not found
+ """
+ with self._lock:
+ if (cached := self._stats_cache.get(task_name)) is not None:
+ return dict(cached)
+ task_data = self._data.get(task_name)
+ if task_data is None or task_data["total_runs"] == 0:
+ return None
+ version = self._version
+ snapshot = self._snapshot_task(task_name, task_data)
+
+ stats = self._build_stats(*snapshot)
+ with self._lock:
+ # An execution recorded meanwhile already invalidated these stats
+ if self._version == version:
+ self._stats_cache[task_name] = stats
+ return dict(stats)
+
  def get_all_stats(self) -> List[Dict[str, Any]]:
  """Get statistics for all tasks.
 
  Returns:
  List of task statistics dictionaries
  """
- stats = []
- for task_name in self._data:
- if task_stats := self.get_task_stats(task_name):
- stats.append(task_stats)
- return sorted(stats, key=lambda x: x["last_run"], reverse=True)
+ with self._lock:
+ if self._all_stats_cache is not None:
+ return [dict(task_stats) for task_stats in self._all_stats_cache]
+ version = self._version
+ # Reuse cached per-task stats; copy the rest to build them outside the lock
+ items = [
+ self._stats_cache.get(name) or self._snapshot_task(name, task_data)
+ for name, task_data in self._data.items()
+ if task_data["total_runs"]
+ ]
+
+ stats = [item if isinstance(item, dict) else self._build_stats(*item) for item in items]
+ with self._lock:
+ # Executions recorded meanwhile would make this list stale
+ if self._version == version:
+ self._all_stats_cache = stats
+ return [dict(task_stats) for task_stats in stats]
 
  def get_recommendations(self, task_name: str) -> List[str]:
  """Analyze task history and provide recommendations.
@@ -178,37 +788,11 @@ class TaskAnalytics:
  if not stats:
  return ["No execution history available yet."]
 
- recommendations = []
-
- # Check success rate
- if stats["success_rate"] < 80:
- recommendations.append(
- f"️ Low success rate ({stats['success_rate']:.1f}%). "
- "Consider adding error handling or increasing retry attempts."
- )
-
- # Check for frequent retries
- avg_retries = stats["total_retries"] / stats["total_runs"]
- if avg_retries > 0.5:
- recommendations.append(
- f" High retry rate ({avg_retries:.1f} per run). "
- "The task may be failing frequently. Check error logs."
- )
-
- # Check execution duration
- if stats["avg_duration"] > 300: # 5 minutes
- recommendations.append(
- f"⏱️ Long average duration ({stats['avg_duration']:.1f}s). "
- "Consider optimizing the task or running it less frequently."
- )
-
- # Check recent failures
- recent = stats["recent_history"][-5:]
- recent_failures = sum(not r["success"] for r in recent)
- if recent_failures >= 3:
- recommendations.append(
- " Multiple recent failures detected. Check task implementation."
- )
+ recommendations = [
+ template.format(**stats)
+ for applies, template in _RECOMMENDATION_RULES
+ if applies(stats)
+ ]
 
  if not recommendations:
  recommendations.append(" Task is performing well! No recommendations.")
@@ -227,6 +811,8 @@ class Dashboard:
  """
  self.analytics = analytics or TaskAnalytics()
  self.console = Console() if RICH_AVAILABLE else None
+ self._live_table: Optional["Table"] = None
+ self._live_key: Optional[tuple] = None
 
  def _check_rich(self) -> None:
  """Check if rich is available."""
@@ -260,30 +846,19 @@ class Dashboard:
  table.add_column("Last Run", justify="right", style="yellow")
  table.add_column("Status", justify="center")
 
- for task_stat in stats:
- # Status emoji based on success rate
- if task_stat["success_rate"] >= 95:
- status = ""
- elif task_stat["success_rate"] >= 80:
- status = "️"
- else:
- status = ""
-
- # Format last run time
- last_run = datetime.fromisoformat(task_stat["last_run"])
- time_ago = self._format_time_ago(last_run)
-
- # Format duration
- duration = f"{task_stat['avg_duration']:.2f}s"
-
- table.add_row(
+ rows = [
+ (
  task_stat["task_name"],
  str(task_stat["total_runs"]),
  f"{task_stat['success_rate']:.1f}%",
- duration,
- time_ago,
- status,
+ f"{task_stat['avg_duration']:.2f}s",
+ self._format_time_ago(task_stat["last_run_epoch"]),
+ _status_icon(task_stat["success_rate"]),
  )
+ for task_stat in stats
+ ]
+ for row in rows:
+ table.add_row(*row)
 
  self.console.print(table)
 
@@ -316,8 +891,8 @@ class Dashboard:
  info_table.add_row("Avg Duration", f"{stats['avg_duration']:.2f}s")
  info_table.add_row("Total Retries", str(stats["total_retries"]))
 
- first_run = datetime.fromisoformat(stats["first_run"])
- last_run = datetime.fromisoformat(stats["last_run"])
+ first_run = datetime.fromtimestamp(stats["first_run_epoch"])
+ last_run = datetime.fromtimestamp(stats["last_run_epoch"])
  info_table.add_row("First Run", first_run.strftime("%Y-%m-%d %H:%M:%S"))
  info_table.add_row("Last Run", last_run.strftime("%Y-%m-%d %H:%M:%S"))
 
@@ -339,7 +914,7 @@ class Dashboard:
  history_table.add_column("Error", style="red")
 
  for record in reversed(stats["recent_history"][-10:]):
- timestamp = datetime.fromisoformat(record["timestamp"])
+ timestamp = datetime.fromtimestamp(record["timestamp_epoch"])
  time_str = timestamp.strftime("%m-%d %H:%M:%S")
  status = "" if record["success"] else ""
  duration = f"{record['duration']:.2f}s"
@@ -377,23 +952,37 @@ class Dashboard:
  try:
  with Live(
  self._generate_live_view(),
- refresh_per_second=1 / refresh_rate,
  console=self.console,
+ auto_refresh=False,
  ) as live:
+ next_tick = time.monotonic()
  while True:
- import time
-
- time.sleep(refresh_rate)
- live.update(self._generate_live_view())
+ next_tick += refresh_rate
+ time.sleep(max(0.0, next_tick - time.monotonic()))
+
+ # Redraw when the table was rebuilt or its clock moved on
+ previous = self._live_table
+ previous_title = previous.title if previous is not None else None
+ table = self._generate_live_view()
+ if table is not previous or table.title != previous_title:
+ live.update(table, refresh=True)
  except KeyboardInterrupt:
  self.console.print("\n[yellow]Live monitor stopped.[/yellow]")
 
  def _generate_live_view(self) -> "Table":
  """Generate the live dashboard view."""
  stats = self.analytics.get_all_stats()
+ title = f" AutoCron Live Dashboard - {datetime.now().strftime('%H:%M:%S')}"
+ times_ago = tuple(self._format_time_ago(task_stat["last_run_epoch"]) for task_stat in stats)
+
+ # Reuse the previous table when no execution landed and no label changed
+ key = (self.analytics.version, times_ago)
+ if self._live_table is not None and key == self._live_key:
+ self._live_table.title = title
+ return self._live_table
 
  table = Table(
- title=f" AutoCron Live Dashboard - {datetime.now().strftime('%H:%M:%S')}",
+ title=title,
  box=box.ROUNDED,
  show_header=True,
  header_style="bold magenta",
@@ -409,48 +998,45 @@ class Dashboard:
  if not stats:
  table.add_row("No tasks", "-", "-", "-", "-", "⏳")
  else:
- for task_stat in stats:
- status = (
- ""
- if task_stat["success_rate"] >= 95
- else "️" if task_stat["success_rate"] >= 80 else ""
- )
- last_run = datetime.fromisoformat(task_stat["last_run"])
- time_ago = self._format_time_ago(last_run)
-
- table.add_row(
+ rows = [
+ (
  task_stat["task_name"],
  str(task_stat["total_runs"]),
  f"{task_stat['success_rate']:.1f}%",
  f"{task_stat['avg_duration']:.1f}s",
  time_ago,
- status,
+ _status_icon(task_stat["success_rate"]),
  )
+ for task_stat, time_ago in zip(stats, times_ago)
+ ]
+ for row in rows:
+ table.add_row(*row)
 
+ self._live_table = table
+ self._live_key = key
  return table
 
- def _format_time_ago(self, dt: datetime) -> str:
- """Format a datetime as 'time ago' string.
+ def _format_time_ago(self, epoch: float) -> str:
+ """Format an epoch timestamp as 'time ago' string.
 
  Args:
- dt: Datetime to format
+ epoch: Timestamp in seconds since the epoch
 
  Returns:
  Human-readable time ago string
  """
- now = datetime.now()
- diff = now - dt
+ diff = time.time() - epoch
 
- if diff < timedelta(minutes=1):
+ if diff < 60:
  return "just now"
- elif diff < timedelta(hours=1):
- mins = int(diff.total_seconds() / 60)
+ elif diff < 3600:
+ mins = int(diff / 60)
  return f"{mins}m ago"
- elif diff < timedelta(days=1):
- hours = int(diff.total_seconds() / 3600)
+ elif diff < 86400:
+ hours = int(diff / 3600)
  return f"{hours}h ago"
  else:
- days = diff.days
+ days = int(diff // 86400)
  return f"{days}d ago"
 
  def export_stats(self, output_file: Optional[str] = None) -> None:
@@ -464,8 +1050,7 @@ class Dashboard:
 
  stats = self.analytics.get_all_stats()
 
- with open(output_file, "w") as f:
- json.dump(stats, f, indent=2, default=str)
+ Path(output_file).write_bytes(_dumps_pretty(stats))
 
  if self.console:
  self.console.print(f"[green] Stats exported to {output_file}[/green]")
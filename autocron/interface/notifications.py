@@ -9,7 +9,7 @@ import smtplib
 from abc import ABC, abstractmethod
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
 from autocron.core.utils import safe_import
 
@@ -196,7 +196,7 @@ class NotificationManager:
  self.add_notifier("email", notifier)
 
  def notify(
- self, title: str, message: str, channels: Optional[list] = None, **kwargs
+ self, title: str, message: str, channels: Optional[Sequence[str]] = None, **kwargs
  ) -> Dict[str, bool]:
  """
  Send notification through specified channels.
@@ -227,7 +227,7 @@ class NotificationManager:
  return results
 
  def notify_task_success(
- self, task_name: str, duration: float, channels: Optional[list] = None
+ self, task_name: str, duration: float, channels: Optional[Sequence[str]] = None
  ) -> Dict[str, bool]:
  """
  Notify task success.
@@ -251,7 +251,7 @@ class NotificationManager:
  error: str,
  attempt: int,
  max_retries: int,
- channels: Optional[list] = None,
+ channels: Optional[Sequence[str]] = None,
  ) -> Dict[str, bool]:
  """
  Notify task failure.
@@ -274,7 +274,7 @@ class NotificationManager:
  return self.notify(title, message, channels)
 
  def notify_scheduler_error(
- self, error: str, channels: Optional[list] = None
+ self, error: str, channels: Optional[Sequence[str]] = None
  ) -> Dict[str, bool]:
  """
  Notify scheduler error.
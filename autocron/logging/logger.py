@@ -5,6 +5,7 @@ Provides comprehensive logging functionality with rotation, formatting,
 and multiple output handlers.
 """
 
+import io
 import logging
 import os
 from logging.handlers import RotatingFileHandler
@@ -12,6 +13,15 @@ from typing import Optional
 
 from autocron.core.utils import ensure_directory, get_default_log_path
 
+# Formatters hold no per-record state, so every logger shares the same two
+_DETAILED_FORMATTER = logging.Formatter(
+ "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
+ datefmt="%Y-%m-%d %H:%M:%S",
+)
+_SIMPLE_FORMATTER = logging.Formatter(
+ "%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+)
+
 
 class AutoCronLogger:
  """
@@ -25,6 +35,9 @@ class AutoCronLogger:
  - Performance tracking
  """
 
+ # Bytes read per step when scanning backwards for recent log lines
+ TAIL_BLOCK_SIZE = 8192
+
  def __init__(
  self,
  name: str = "autocron",
@@ -69,29 +82,19 @@ class AutoCronLogger:
  # Remove existing handlers
  self.logger.handlers.clear()
 
- # Create formatters
- detailed_formatter = logging.Formatter(
- "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
- datefmt="%Y-%m-%d %H:%M:%S",
- )
-
- simple_formatter = logging.Formatter(
- "%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
- )
-
  # File handler with rotation
  file_handler = RotatingFileHandler(
  self.log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
  )
  file_handler.setLevel(self.log_level)
- file_handler.setFormatter(detailed_formatter)
+ file_handler.setFormatter(_DETAILED_FORMATTER)
  self.logger.addHandler(file_handler)
 
  # Console handler
  if console_output:
  console_handler = logging.StreamHandler()
  console_handler.setLevel(self.log_level)
- console_handler.setFormatter(simple_formatter)
+ console_handler.setFormatter(_SIMPLE_FORMATTER)
  self.logger.addHandler(console_handler)
 
  def debug(self, message: str, **kwargs) -> None:
@@ -176,9 +179,28 @@ class AutoCronLogger:
  List of log lines
  """
  try:
+ if lines <= 0:
  with open(self.log_file, "r", encoding="utf-8") as f:
- all_lines = f.readlines()
- return all_lines[-lines:]
+ return f.readlines()[-lines:]
+
+ # Read backwards from the end until the last `lines` lines are covered
+ with open(self.log_file, "rb") as f:
+ pos = f.seek(0, os.SEEK_END)
+ blocks = []
+ newlines = 0
+ while pos > 0 and newlines <= lines:
+ step = min(self.TAIL_BLOCK_SIZE, pos)
+ pos -= step
+ f.seek(pos)
+ block = f.read(step)
+ blocks.append(block)
+ newlines += block.count(b"\n")
+ data = b"".join(reversed(blocks))
+
+ # Drop the partial line the first block started in
+ if pos > 0:
+ data = data[data.index(b"\n") + 1 :]
+ return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").readlines()[-lines:]
  except Exception as e:
  self.error(f"Failed to read log file: {e}")
  return []
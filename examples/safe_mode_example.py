@@ -326,7 +326,7 @@ print("Task completed")
  new_scheduler = AutoCron()
  new_scheduler.load_tasks()
 
- loaded_task = list(new_scheduler.tasks.values())[0]
+ loaded_task = next(iter(new_scheduler.tasks.values()))
  print(f"\n Loaded task '{loaded_task.name}'")
  print(f" Safe mode: {loaded_task.safe_mode}")
  print(f" Memory limit: {loaded_task.max_memory_mb}MB")
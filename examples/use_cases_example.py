@@ -25,6 +25,7 @@ def scrape_website():
  print(f"[{datetime.now()}] Scraping website...")
  try:
  # Example: Fetch data from API
+ # import requests # import where used so loading the example stays cheap
  # response = requests.get('https://api.example.com/data')
  # data = response.json()
  print("Scraping completed!")
@@ -57,6 +58,7 @@ def health_check():
  """Monitor API health."""
  print(f"[{datetime.now()}] Running health check...")
  try:
+ # import requests # import where used so loading the example stays cheap
  # response = requests.get('https://api.example.com/health')
  # if response.status_code == 200:
  print(" API is healthy")
@@ -1,10 +1,13 @@
 """Pytest configuration and fixtures."""
 
-import os
 import tempfile
+from unittest.mock import patch
 
 import pytest
 
+_TEST_SCRIPT_SRC = 'import sys\nprint("Test script executed")\nsys.exit(0)\n'
+_FAILING_SCRIPT_SRC = 'import sys\nprint("Test script failed")\nsys.exit(1)\n'
+
 
 def pytest_configure(config):
  """Configure pytest."""
@@ -22,38 +25,45 @@ def temp_dir():
  yield tmpdir
 
 
-@pytest.fixture
-def test_script(temp_dir):
- """Create a test script file."""
- script_path = os.path.join(temp_dir, "test_script.py")
+@pytest.fixture(scope="session")
+def script_dir(tmp_path_factory):
+ """Create a directory for test scripts shared by the whole session."""
+ return tmp_path_factory.mktemp("scripts")
 
- with open(script_path, "w") as f:
- f.write(
- """
-import sys
-print("Test script executed")
-sys.exit(0)
-"""
- )
 
- return script_path
+@pytest.fixture(scope="session")
+def test_script(script_dir):
+ """Create a test script file."""
+ script_path = script_dir / "test_script.py"
+ script_path.write_text(_TEST_SCRIPT_SRC)
+ return str(script_path)
 
 
-@pytest.fixture
-def failing_script(temp_dir):
+@pytest.fixture(scope="session")
+def failing_script(script_dir):
  """Create a failing test script."""
- script_path = os.path.join(temp_dir, "failing_script.py")
+ script_path = script_dir / "failing_script.py"
+ script_path.write_text(_FAILING_SCRIPT_SRC)
+ return str(script_path)
+
+
+@pytest.fixture(scope="session")
+def scheduler_factory(tmp_path_factory):
+ """Return a callable that builds schedulers sharing one analytics store.
 
- with open(script_path, "w") as f:
- f.write(
+ Loading analytics dominates AutoCron() construction, so the store is created
+ once per session (in a temporary directory) and handed to every scheduler.
  """
-import sys
-print("Test script failed")
-sys.exit(1)
-"""
- )
+ from autocron.core.scheduler import AutoCron
+ from autocron.interface import dashboard
+
+ analytics = dashboard.TaskAnalytics(tmp_path_factory.mktemp("analytics") / "analytics.json")
+
+ def factory(**kwargs):
+ with patch.object(dashboard, "TaskAnalytics", return_value=analytics):
+ return AutoCron(**kwargs)
 
- return script_path
+ return factory
 
 
 @pytest.fixture(autouse=True)
@@ -0,0 +1,414 @@
+"""Tests for task analytics storage."""
+
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from autocron.interface import dashboard
+from autocron.interface.dashboard import ExecutionRecord, TaskAnalytics
+
+
+class TestTaskAnalytics:
+ """Test execution recording and persistence."""
+
+ @pytest.fixture
+ def analytics(self, tmp_path):
+ """Create an analytics instance backed by a temporary file."""
+ return TaskAnalytics(storage_path=tmp_path / "analytics.json")
+
+ def test_record_execution_updates_stats(self, analytics):
+ """Test that recorded executions are reflected in stats."""
+ analytics.record_execution("task", success=True, duration=1.0)
+ analytics.record_execution("task", success=False, duration=3.0, error="boom")
+
+ stats = analytics.get_task_stats("task")
+ assert stats["total_runs"] == 2
+ assert stats["successful_runs"] == 1
+ assert stats["failed_runs"] == 1
+ assert stats["avg_duration"] == 2.0
+ assert stats["success_rate"] == 50.0
+
+ def test_writes_are_batched(self, analytics):
+ """Test that records are buffered until the flush threshold."""
+ analytics.FLUSH_THRESHOLD = 3
+ analytics.FLUSH_INTERVAL = 3600
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.record_execution("task", success=True, duration=0.1)
+ assert not analytics.journal_path.exists()
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ lines = analytics.journal_path.read_text().splitlines()
+ assert [json.loads(line)["task"] for line in lines] == ["task"] * 3
+
+ def test_flush_writes_pending_records(self, analytics):
+ """Test that flush persists buffered records."""
+ analytics.FLUSH_INTERVAL = 3600
+ analytics.record_execution("task", success=True, duration=0.1)
+
+ analytics.flush()
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 1
+ assert not analytics.storage_path.with_name("analytics.json.tmp").exists()
+
+ def test_pending_records_flushed_on_collection(self, tmp_path):
+ """Test that buffered records are written when the instance is collected."""
+ storage_path = tmp_path / "analytics.json"
+ analytics = TaskAnalytics(storage_path=storage_path)
+ analytics.FLUSH_INTERVAL = 3600
+ analytics.record_execution("task", success=True, duration=0.1)
+
+ del analytics
+
+ reloaded = TaskAnalytics(storage_path=storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 1
+
+ def test_stats_cached_until_next_execution(self, analytics):
+ """Test that derived stats are reused until new data is recorded."""
+ analytics.record_execution("task", success=True, duration=1.0)
+ version = analytics.version
+
+ first = analytics.get_task_stats("task")
+ cached = analytics._stats_cache["task"]
+ assert analytics.get_task_stats("task") == first
+ assert analytics._stats_cache["task"] is cached
+ # Callers get copies, so changing one leaves the cache intact
+ first["total_runs"] = 99
+ analytics.get_all_stats()[0]["total_runs"] = 99
+ assert analytics.get_task_stats("task")["total_runs"] == 1
+ assert analytics.get_all_stats()[0]["total_runs"] == 1
+
+ analytics.record_execution("task", success=True, duration=3.0)
+
+ assert analytics.version == version + 1
+ refreshed = analytics.get_task_stats("task")
+ assert analytics._stats_cache["task"] is not cached
+ assert refreshed["total_runs"] == 2
+ assert analytics.get_all_stats()[0]["total_runs"] == 2
+
+ def test_stats_built_across_a_record_not_cached(self, analytics, monkeypatch):
+ """Test that stats computed while an execution is recorded are not cached."""
+ analytics.record_execution("task", success=True, duration=1.0)
+ build_stats = analytics._build_stats
+
+ def build_while_recording(*snapshot):
+ monkeypatch.undo()
+ analytics.record_execution("task", success=True, duration=1.0)
+ return build_stats(*snapshot)
+
+ monkeypatch.setattr(analytics, "_build_stats", build_while_recording)
+
+ assert analytics.get_task_stats("task")["total_runs"] == 1
+ assert "task" not in analytics._stats_cache
+ assert analytics.get_task_stats("task")["total_runs"] == 2
+
+ def test_history_is_bounded(self, analytics):
+ """Test that only the most recent executions are kept."""
+ analytics.FLUSH_INTERVAL = 3600
+ for i in range(analytics.HISTORY_SIZE + 5):
+ analytics.record_execution("task", success=True, duration=float(i))
+ analytics.compact()
+
+ data = json.loads(analytics.storage_path.read_text())
+ assert len(data["task"]["history"]) == analytics.HISTORY_SIZE
+ assert data["task"]["history"][-1]["duration"] == analytics.HISTORY_SIZE + 4
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ recent = reloaded.get_task_stats("task")["recent_history"]
+ assert [r["duration"] for r in recent] == [float(i) for i in range(95, 105)]
+
+ def test_saved_json_is_compact_without_orjson(self, analytics, monkeypatch):
+ """Test that the stdlib fallback writes the same compact JSON."""
+ monkeypatch.setattr(dashboard, "ORJSON_AVAILABLE", False)
+ analytics.record_execution("task", success=True, duration=0.5)
+ analytics.compact()
+
+ text = analytics.storage_path.read_text()
+ assert "\n" not in text
+ assert json.loads(text)["task"]["history"][0]["duration"] == 0.5
+
+ def test_aggregates_maintained_incrementally(self, analytics):
+ """Test that derived fields track the recent-failure window."""
+ for success in [False, False, False, True, True]:
+ analytics.record_execution("task", success=success, duration=2.0, retry_count=1)
+ assert analytics.get_task_stats("task")["recent_failures"] == 3
+ assert any("recent failures" in r for r in analytics.get_recommendations("task"))
+
+ analytics.record_execution("task", success=True, duration=2.0)
+ stats = analytics.get_task_stats("task")
+ assert stats["recent_failures"] == 2
+ assert stats["avg_retries"] == pytest.approx(5 / 6)
+ assert stats["success_rate"] == pytest.approx(50.0)
+ analytics.flush()
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["recent_failures"] == 2
+
+ def test_epoch_timestamps_derived_for_old_files(self, tmp_path):
+ """Test that files written before epoch fields existed still load."""
+ storage_path = tmp_path / "analytics.json"
+ record = {
+ "timestamp": "2024-01-01T12:00:00",
+ "success": True,
+ "duration": 1.0,
+ "error": None,
+ "retry_count": 0,
+ }
+ storage_path.write_text(
+ json.dumps(
+ {
+ "task": {
+ "total_runs": 1,
+ "successful_runs": 1,
+ "failed_runs": 0,
+ "total_duration": 1.0,
+ "total_retries": 0,
+ "history": [record],
+ "first_run": record["timestamp"],
+ "last_run": record["timestamp"],
+ }
+ }
+ )
+ )
+
+ stats = TaskAnalytics(storage_path=storage_path).get_task_stats("task")
+ expected = datetime(2024, 1, 1, 12).timestamp()
+ assert stats["last_run_epoch"] == expected
+ assert stats["recent_history"][0]["timestamp_epoch"] == expected
+
+ def test_all_stats_ordered_by_most_recent_run(self, analytics):
+ """Test that tasks are listed most recently run first."""
+ for name in ["a", "b", "c", "a"]:
+ analytics.record_execution(name, success=True, duration=0.1)
+ assert [s["task_name"] for s in analytics.get_all_stats()] == ["a", "c", "b"]
+ analytics.flush()
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert [s["task_name"] for s in reloaded.get_all_stats()] == ["a", "c", "b"]
+
+ @pytest.mark.parametrize("content", ["", "{not json"])
+ def test_unreadable_file_starts_empty(self, tmp_path, content):
+ """Test that empty or corrupt storage files are ignored."""
+ storage_path = tmp_path / "analytics.json"
+ storage_path.write_text(content)
+ assert TaskAnalytics(storage_path=storage_path).get_all_stats() == []
+
+ def test_journal_compacted_into_snapshot(self, analytics):
+ """Test that a full journal is folded into the snapshot and truncated."""
+ analytics.FLUSH_THRESHOLD = 1
+ analytics.COMPACT_THRESHOLD = 3
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.record_execution("task", success=False, duration=0.1)
+ analytics.flush()
+ assert not analytics.storage_path.exists()
+ assert len(analytics.journal_path.read_text().splitlines()) == 2
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ assert analytics.journal_path.read_text() == ""
+ assert json.loads(analytics.storage_path.read_text())["task"]["total_runs"] == 3
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 4
+ assert reloaded.get_task_stats("task")["failed_runs"] == 1
+
+ def test_batch_submitted_after_compaction_not_replayed(self, analytics, monkeypatch):
+ """Test that a batch the snapshot already holds is not journaled again."""
+ analytics.FLUSH_INTERVAL = 3600
+ for _ in range(3):
+ analytics.record_execution("task", success=True, duration=0.1)
+ writer = analytics._writer
+ submit = writer.submit
+
+ def compact_then_submit(item, timeout=None):
+ # Compaction runs after the batch left the buffer but before it is queued
+ monkeypatch.undo()
+ writer.submit(dashboard._COMPACT)
+ writer.wait()
+ return submit(item, timeout=timeout)
+
+ monkeypatch.setattr(writer, "submit", compact_then_submit)
+ analytics.flush()
+
+ assert analytics.journal_path.read_text() == ""
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 3
+
+ def test_close_right_after_compact_stops_writer(self, analytics, monkeypatch):
+ """Test that a stop queued behind a running compaction still ends the writer."""
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ writer = analytics._writer
+ compacting, release = threading.Event(), threading.Event()
+ dumps = dashboard._dumps_compact
+
+ def slow_dumps(data):
+ compacting.set()
+ release.wait(5)
+ return dumps(data)
+
+ # Hold the compaction inside its snapshot until the stop marker is queued
+ monkeypatch.setattr(dashboard, "_dumps_compact", slow_dumps)
+ writer.submit(dashboard._COMPACT)
+ assert compacting.wait(5)
+ closer = threading.Thread(target=writer.close, daemon=True)
+ closer.start()
+ while writer.queue.empty():
+ time.sleep(0.01)
+ release.set()
+
+ closer.join(5)
+ assert not closer.is_alive()
+ assert not writer._thread.is_alive()
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 1
+
+ def test_compact_does_not_block_on_stalled_writer(self, analytics, monkeypatch):
+ """Test that compaction gives up after a bounded wait when the writer queue is full."""
+ analytics.record_execution("task", success=True, duration=0.1)
+ messages = []
+ monkeypatch.setattr(dashboard, "_log_storage_problem", messages.append)
+
+ def full_queue(item, timeout=None):
+ assert timeout is not None, "blocking submit"
+ return False
+
+ monkeypatch.setattr(analytics._writer, "submit", full_queue)
+ analytics.compact()
+
+ assert messages == ["Analytics writer is stalled, compaction postponed"]
+ # Still dirty, so the next compact() tries again
+ assert analytics._dirty
+
+ def test_torn_journal_line_is_skipped(self, analytics):
+ """Test that a partially written final journal line is ignored."""
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ with open(analytics.journal_path, "a") as f:
+ f.write('{"task": "task", "succ')
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert reloaded.get_task_stats("task")["total_runs"] == 1
+
+ def test_concurrent_records_all_persisted(self, analytics):
+ """Test that records from several threads all reach the journal."""
+ analytics.FLUSH_THRESHOLD = 7
+ analytics.COMPACT_THRESHOLD = 50
+
+ def record(name):
+ for _ in range(40):
+ analytics.record_execution(name, success=True, duration=0.1)
+
+ threads = [threading.Thread(target=record, args=(f"task{i}",)) for i in range(4)]
+ for thread in threads:
+ thread.start()
+ for thread in threads:
+ thread.join()
+ analytics.flush()
+
+ reloaded = TaskAnalytics(storage_path=analytics.storage_path)
+ assert [reloaded.get_task_stats(f"task{i}")["total_runs"] for i in range(4)] == [40] * 4
+
+ def test_all_stats_while_recording(self, analytics):
+ """Test that listing stats is safe while other threads record executions."""
+ analytics.FLUSH_INTERVAL = 3600
+ done = threading.Event()
+
+ def record():
+ for i in range(2000):
+ analytics.record_execution(f"task{i % 50}", success=True, duration=0.1)
+ done.set()
+
+ thread = threading.Thread(target=record)
+ thread.start()
+ try:
+ while not done.is_set():
+ analytics.get_all_stats()
+ finally:
+ thread.join()
+
+ stats = analytics.get_all_stats()
+ assert len(stats) == 50
+ assert sum(s["total_runs"] for s in stats) == 2000
+
+ def test_execution_record_round_trip(self):
+ """Test that records convert to and from their serialized form."""
+ record = ExecutionRecord(1700000000.5, False, 2.5, error="boom", retry_count=2)
+ data = record.to_dict()
+
+ assert data["timestamp"] == datetime.fromtimestamp(1700000000.5).isoformat()
+ restored = ExecutionRecord.from_dict(data)
+ assert restored.to_dict() == data
+
+ def test_unchanged_snapshot_not_rewritten(self, analytics, monkeypatch):
+ """Test that compacting without new executions skips the snapshot write."""
+ writes = []
+ original = dashboard._write_bytes_atomic
+ monkeypatch.setattr(
+ dashboard,
+ "_write_bytes_atomic",
+ lambda path, payload: writes.append(path) or original(path, payload),
+ )
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.compact()
+ analytics.compact()
+ assert len(writes) == 1
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.compact()
+ assert len(writes) == 2
+
+ def test_failed_journal_backlog_is_bounded(self, tmp_path, monkeypatch):
+ """Test that records kept for retry are capped, dropping the oldest."""
+ monkeypatch.setattr(dashboard._JournalWriter, "FAILED_LIMIT", 5)
+ messages = []
+ monkeypatch.setattr(dashboard, "_log_storage_problem", messages.append)
+
+ def failing_append(path, entries):
+ raise OSError("disk full")
+
+ monkeypatch.setattr(dashboard, "_append_entries", failing_append)
+ writer = dashboard._JournalWriter(
+ tmp_path / "analytics.json", tmp_path / "analytics.ndjson", {}, threading.Lock(), []
+ )
+ records = [(f"task{i}", ExecutionRecord(time.time(), True, 0.1)) for i in range(8)]
+
+ writer._write(records[:4])
+ writer._write(records[4:])
+
+ assert list(writer._failed) == records[3:]
+ assert messages[-1] == "Dropping 3 oldest analytics records while journal writes fail"
+
+ def test_failed_journal_write_is_retried(self, analytics, monkeypatch):
+ """Test that records survive a failed write and are retried with backoff."""
+ monkeypatch.setattr(dashboard._JournalWriter, "RETRY_INITIAL_DELAY", 0.01)
+ monkeypatch.setattr(dashboard, "_log_storage_problem", lambda message: None)
+ original = dashboard._append_entries
+ failures = iter([OSError("disk full")])
+
+ def flaky_append(path, entries):
+ error = next(failures, None)
+ if error:
+ raise error
+ original(path, entries)
+
+ monkeypatch.setattr(dashboard, "_append_entries", flaky_append)
+
+ analytics.record_execution("task", success=True, duration=0.1)
+ analytics.flush()
+ assert next(failures, None) is None
+
+ for _ in range(200):
+ if not analytics.degraded:
+ break
+ time.sleep(0.01)
+ assert not analytics.degraded
+ assert len(analytics.journal_path.read_text().splitlines()) == 1
@@ -1,49 +1,57 @@
 """Tests for async task execution."""
 
 import asyncio
+import functools
+import sys
+import threading
 import time
+import types
 
 import pytest
 
+from autocron.core import scheduler as scheduler_module
 from autocron.core.scheduler import AutoCron, TaskExecutionError
 
 
+@pytest.fixture(scope="module")
+def shared_scheduler():
+ """Create one scheduler instance for the whole module."""
+ scheduler = AutoCron()
+ yield scheduler
+ scheduler.stop()
+
+
+@pytest.fixture
+def scheduler(shared_scheduler):
+ """Provide the shared scheduler, stopped and emptied after each test."""
+ yield shared_scheduler
+ shared_scheduler.stop()
+ shared_scheduler.clear_tasks()
+
+
 class TestAsyncTasks:
  """Test async/await task execution."""
 
- @pytest.fixture
- def scheduler(self):
- """Create a scheduler instance."""
- return AutoCron()
-
  @pytest.mark.asyncio
  async def test_basic_async_task(self, scheduler):
  """Test basic async task execution."""
  # Track execution
- executed = []
+ executed = threading.Event()
 
  async def async_task():
- await asyncio.sleep(0.1)
- executed.append(1)
+ await asyncio.sleep(0)
+ executed.set()
  return "async result"
 
  # Add and start scheduler
  scheduler.add_task(name="async_task", func=async_task, every="1s")
-
- # Start scheduler in background
- import threading
-
- def run_scheduler():
  scheduler.start(blocking=False)
- time.sleep(2)
- scheduler.stop()
-
- thread = threading.Thread(target=run_scheduler, daemon=True)
- thread.start()
- thread.join(timeout=5)
 
  # Verify task executed
- assert executed
+ try:
+ assert await asyncio.to_thread(executed.wait, 5)
+ finally:
+ scheduler.stop()
 
  def test_async_function_execution(self, scheduler):
  """Test direct async function execution."""
@@ -70,6 +78,15 @@ class TestAsyncTasks:
  with pytest.raises(TaskExecutionError, match="timed out"):
  scheduler._execute_function(slow_async_func, timeout=1)
 
+ def test_async_function_own_timeout_error(self, scheduler):
+ """Test that a TimeoutError raised by the task is not reported as a scheduler timeout."""
+
+ async def waits_on_something():
+ await asyncio.wait_for(asyncio.sleep(10), timeout=0.05)
+
+ with pytest.raises(asyncio.TimeoutError):
+ scheduler._execute_function(waits_on_something, timeout=5)
+
  def test_async_function_error(self, scheduler):
  """Test async function that raises error."""
 
@@ -82,68 +99,71 @@ class TestAsyncTasks:
 
  def test_mixed_sync_and_async_tasks(self, scheduler):
  """Test scheduler with both sync and async tasks."""
- sync_executed = []
- async_executed = []
+ sync_executed = threading.Event()
+ async_executed = threading.Event()
 
  def sync_task():
- time.sleep(0.1)
- sync_executed.append(1)
+ sync_executed.set()
 
  async def async_task():
- await asyncio.sleep(0.1)
- async_executed.append(1)
+ await asyncio.sleep(0)
+ async_executed.set()
 
  # Add both types of tasks
  scheduler.add_task(name="sync_task", func=sync_task, every="1s")
  scheduler.add_task(name="async_task", func=async_task, every="1s")
 
- # Start scheduler briefly
+ # Both should have executed
  scheduler.start(blocking=False)
- time.sleep(2)
+ try:
+ assert sync_executed.wait(5)
+ assert async_executed.wait(5)
+ finally:
  scheduler.stop()
 
- # Both should have executed
- assert sync_executed
- assert async_executed
-
- def test_async_task_with_retries(self, scheduler):
+ def test_async_task_with_retries(self, scheduler, monkeypatch):
  """Test async task with retry logic."""
  attempts = []
+ succeeded = threading.Event()
 
  async def flaky_async_task():
- await asyncio.sleep(0.05)
+ await asyncio.sleep(0)
  attempts.append(1)
  # sourcery skip: no-conditionals-in-tests
  if len(attempts) < 2:
  raise ValueError("First attempt fails")
+ succeeded.set()
  return "success"
 
+ # Retry immediately instead of waiting out the backoff
+ monkeypatch.setattr(scheduler_module, "calculate_retry_delay", lambda attempt, base: 0)
+
  # Add task with retries
  scheduler.add_task(
  name="flaky_task", func=flaky_async_task, every="1s", retries=2, retry_delay=1
  )
 
- # Start scheduler
+ # Should have retried and succeeded
  scheduler.start(blocking=False)
- time.sleep(4)
+ try:
+ assert succeeded.wait(5)
+ finally:
  scheduler.stop()
-
- # Should have retried and succeeded
  assert len(attempts) >= 2
 
  def test_async_task_with_callback(self, scheduler):
  """Test async task with success/failure callbacks."""
- success_called = []
+ success_called = threading.Event()
  failure_called = []
 
  def on_success():
- success_called.append(1)
+ success_called.set()
 
  def on_failure(error):
  failure_called.append(str(error))
 
  async def async_task():
- await asyncio.sleep(0.05)
+ await asyncio.sleep(0)
  return "done"
 
  # Add task with callbacks
@@ -155,24 +175,25 @@ class TestAsyncTasks:
  on_failure=on_failure,
  )
 
- # Start scheduler
+ # Success callback should be called
  scheduler.start(blocking=False)
- time.sleep(2)
+ try:
+ assert success_called.wait(5)
+ finally:
  scheduler.stop()
-
- # Success callback should be called
- assert success_called
  assert not failure_called
 
  def test_async_task_failure_callback(self, scheduler):
  """Test async task failure callback."""
  failure_called = []
+ failed = threading.Event()
 
  def on_failure(error):
  failure_called.append(str(error))
+ failed.set()
 
  async def failing_task():
- await asyncio.sleep(0.05)
+ await asyncio.sleep(0)
  raise RuntimeError("Async failure")
 
  # Add task with failure callback
@@ -180,13 +201,12 @@ class TestAsyncTasks:
  name="failing_task", func=failing_task, every="1s", retries=0, on_failure=on_failure
  )
 
- # Start scheduler
+ # Failure callback should be called
  scheduler.start(blocking=False)
- time.sleep(2)
+ try:
+ assert failed.wait(5)
+ finally:
  scheduler.stop()
-
- # Failure callback should be called
- assert failure_called
  assert "Async failure" in failure_called[0]
 
  def test_async_task_without_timeout(self, scheduler):
@@ -202,6 +222,42 @@ class TestAsyncTasks:
 
  assert result == ["done"]
 
+ def test_sync_wrapper_of_async_function_runs_sync(self, scheduler):
+ """Test that a sync decorator running an async function itself stays on the sync path."""
+ result = []
+
+ async def async_task():
+ await asyncio.sleep(0.05)
+ result.append("done")
+
+ @functools.wraps(async_task)
+ def decorated():
+ asyncio.run(async_task())
+
+ task_id = scheduler.add_task(name="wrapped", func=decorated, every="1h")
+ task = scheduler.get_task(task_id=task_id)
+ assert not task._is_coroutine
+
+ scheduler._execute_task(task)
+
+ assert result == ["done"]
+ assert task.fail_count == 0
+
+ def test_async_partial_and_callable_detected(self):
+ """Test that partials of async functions and async callables count as async."""
+
+ async def async_task(value):
+ return value
+
+ class AsyncCallable:
+ async def __call__(self):
+ return "called"
+
+ assert scheduler_module._is_coroutine_function(functools.partial(async_task, 1))
+ assert scheduler_module._is_coroutine_function(AsyncCallable())
+ assert not scheduler_module._is_coroutine_function(functools.partial(print, 1))
+ assert not scheduler_module._is_coroutine_function(AsyncCallable)
+
  def test_async_with_asyncio_operations(self, scheduler):
  """Test async task with various asyncio operations."""
  results = []
@@ -225,6 +281,28 @@ class TestAsyncTasks:
  assert ret == "complete"
  assert results == ["step1", "step2", "step3"]
 
+ def test_async_loop_uses_uvloop_when_installed(self, monkeypatch):
+ """Test that the shared event loop comes from uvloop when it is available."""
+ scheduler = AutoCron()
+ created = []
+
+ def new_event_loop():
+ loop = asyncio.new_event_loop()
+ created.append(loop)
+ return loop
+
+ monkeypatch.setitem(
+ sys.modules, "uvloop", types.SimpleNamespace(new_event_loop=new_event_loop)
+ )
+
+ async def async_func():
+ return asyncio.get_running_loop()
+
+ try:
+ assert scheduler._execute_function(async_func, timeout=5) is created[0]
+ finally:
+ scheduler._stop_async_loop()
+
  def test_sync_function_still_works(self, scheduler):
  """Ensure sync functions still work after async support."""
  result = []
@@ -253,68 +331,66 @@ class TestAsyncTasks:
 class TestAsyncTaskIntegration:
  """Integration tests for async tasks."""
 
- @pytest.fixture
- def scheduler(self):
- """Create a scheduler instance."""
- return AutoCron()
-
- def test_async_decorator(self, scheduler):
+ def test_async_decorator(self):
  """Test @schedule decorator with async functions."""
  from autocron.core.scheduler import get_global_scheduler, reset_global_scheduler, schedule
 
  # Reset any existing global scheduler
  reset_global_scheduler()
 
- executed = []
+ executed = threading.Event()
 
  @schedule(every="1s")
  async def async_scheduled():
- await asyncio.sleep(0.05)
- executed.append(1)
+ await asyncio.sleep(0)
+ executed.set()
 
  # Get global scheduler and start
  global_sched = get_global_scheduler()
  assert global_sched is not None
 
+ # Task should have executed
  global_sched.start(blocking=False)
- time.sleep(2)
+ try:
+ assert executed.wait(5)
+ finally:
  global_sched.stop()
 
- # Task should have executed
- assert executed
-
  # Cleanup
  reset_global_scheduler()
 
  def test_multiple_async_tasks_concurrent(self, scheduler):
  """Test multiple async tasks running concurrently."""
  task1_count = []
- task2_count = []
- task3_count = []
+ task1_repeated = threading.Event()
+ task2_done = threading.Event()
+ task3_done = threading.Event()
 
  async def task1():
- await asyncio.sleep(0.1)
+ await asyncio.sleep(0)
  task1_count.append(1)
+ # sourcery skip: no-conditionals-in-tests
+ if len(task1_count) >= 2:
+ task1_repeated.set()
 
  async def task2():
- await asyncio.sleep(0.15)
- task2_count.append(1)
+ await asyncio.sleep(0)
+ task2_done.set()
 
  async def task3():
- await asyncio.sleep(0.2)
- task3_count.append(1)
+ await asyncio.sleep(0)
+ task3_done.set()
 
  # Add all tasks
  scheduler.add_task(name="task1", func=task1, every="1s")
  scheduler.add_task(name="task2", func=task2, every="1s")
  scheduler.add_task(name="task3", func=task3, every="1s")
 
- # Start scheduler
+ # All should have executed, task1 at least twice
  scheduler.start(blocking=False)
- time.sleep(3)
+ try:
+ assert task1_repeated.wait(5)
+ assert task2_done.wait(5)
+ assert task3_done.wait(5)
+ finally:
  scheduler.stop()
-
- # All should have executed
- assert len(task1_count) >= 2
- assert task2_count
- assert task3_count
@@ -2,12 +2,16 @@
 Quick Dashboard Test - Generate sample data and show dashboard.
 """
 
-import random
+import itertools
 import time
 
 from autocron import get_global_scheduler, schedule
 
 
+# Fixed failure pattern (2 in 5 runs) so every run shows the same stats
+_sometimes_fails_pattern = itertools.cycle([True, False, False, True, False])
+
+
 # Example tasks that will generate analytics data
 @schedule(every="3s")
 def quick_task():
@@ -26,9 +30,9 @@ def medium_task():
 @schedule(every="7s", retries=2)
 def sometimes_fails():
  """A task that occasionally fails."""
- if random.random() < 0.4: # 40% chance of failure
+ if next(_sometimes_fails_pattern): # 40% of runs fail
  print(" Sometimes fails - FAILED")
- raise Exception("Simulated random failure")
+ raise Exception("Simulated failure")
  print(" Sometimes fails task executed")
  time.sleep(0.2)
 
@@ -2,17 +2,21 @@
 Test Dashboard with Failures - Show how dashboard handles problematic tasks.
 """
 
-import random
+import itertools
 import time
 
 from autocron import get_global_scheduler, schedule
 
 
+# Fixed failure pattern (7 in 10 runs) so the warnings appear on every run
+_problematic_pattern = itertools.cycle([True] * 7 + [False] * 3)
+
+
 # Task that fails frequently to trigger warnings
 @schedule(every="2s", retries=1)
 def problematic_task():
  """A task that fails 70% of the time."""
- if random.random() < 0.7: # 70% failure rate
+ if next(_problematic_pattern): # 70% failure rate
  raise Exception("Frequent failure - needs attention!")
  print(" Problematic task succeeded (rare)")
  time.sleep(0.1)
@@ -0,0 +1,44 @@
+"""
+Tests for lazy imports from the autocron package root.
+"""
+
+import os
+import subprocess
+import sys
+
+
+def _run(code, **env):
+ """Run code in a fresh interpreter and return its stripped stdout."""
+ result = subprocess.run(
+ [sys.executable, "-c", code],
+ capture_output=True,
+ text=True,
+ check=True,
+ env={**os.environ, **env},
+ )
+ return result.stdout.strip()
+
+
+def test_import_does_not_load_submodules():
+ """Test that importing autocron defers the scheduler and dashboard."""
+ code = (
+ "import sys, autocron; "
+ "print('autocron.core.scheduler' in sys.modules, "
+ "'autocron.interface.dashboard' in sys.modules)"
+ )
+ assert _run(code) == "False False"
+
+
+def test_lazy_symbols_resolve_and_are_listed():
+ """Test that public symbols resolve on access and appear in dir()."""
+ import autocron
+ from autocron.core.scheduler import AutoCron
+
+ assert autocron.AutoCron is AutoCron
+ assert set(autocron.__all__) <= set(dir(autocron))
+
+
+def test_eager_import_env_var():
+ """Test that AUTOCRON_EAGER_IMPORT resolves every public symbol up front."""
+ code = "import sys, autocron; print('autocron.core.scheduler' in sys.modules)"
+ assert _run(code, AUTOCRON_EAGER_IMPORT="1") == "True"
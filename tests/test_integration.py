@@ -1,11 +1,14 @@
 """Integration tests for AutoCron."""
 
 import os
+import threading
 import time
 
 import pytest
 
 from autocron import AutoCron, schedule
+from autocron.core import scheduler as scheduler_module
+from autocron.core.utils import calculate_retry_delay
 
 
 @pytest.mark.integration
@@ -32,46 +35,43 @@ class TestIntegration:
  scheduler.start(blocking=False)
 
  # Wait for task to run
- time.sleep(3)
+ try:
+ for _ in range(500):
+ if task.run_count:
+ break
+ time.sleep(0.01)
+ finally:
+ scheduler.stop()
 
  # Check execution
  task = scheduler.get_task(task_id=task_id)
  assert task.run_count >= 1
 
- # Stop scheduler
- scheduler.stop()
-
  def test_multiple_tasks_execution(self):
  """Test executing multiple tasks."""
  scheduler = AutoCron()
 
- executed_tasks = []
-
- def task1():
- executed_tasks.append("task1")
+ task1_done = threading.Event()
+ task2_done = threading.Event()
 
- def task2():
- executed_tasks.append("task2")
+ scheduler.add_task(name="task1", func=task1_done.set, every="1s")
+ scheduler.add_task(name="task2", func=task2_done.set, every="1s")
 
- scheduler.add_task(name="task1", func=task1, every="1s")
- scheduler.add_task(name="task2", func=task2, every="1s")
-
- # Start and wait
+ # Both tasks should have executed
  scheduler.start(blocking=False)
- time.sleep(2)
+ try:
+ assert task1_done.wait(5)
+ assert task2_done.wait(5)
+ finally:
  scheduler.stop()
 
- # Both tasks should have executed
- assert "task1" in executed_tasks
- assert "task2" in executed_tasks
-
  def test_decorator_integration(self):
  """Test decorator integration."""
- executed = []
+ executed = threading.Event()
 
  @schedule(every="1s")
  def my_task():
- executed.append(True)
+ executed.set()
 
  # Get global scheduler and start
  from autocron.core.scheduler import get_global_scheduler, start_scheduler
@@ -80,22 +80,28 @@ class TestIntegration:
  assert scheduler is not None
 
  # Start in background
- import threading
-
  thread = threading.Thread(target=lambda: start_scheduler(blocking=True), daemon=True)
  thread.start()
 
  # Wait for execution
- time.sleep(2)
-
+ try:
+ assert executed.wait(5)
+ finally:
  scheduler.stop()
 
- assert executed
-
- def test_task_retry_mechanism(self):
+ def test_task_retry_mechanism(self, monkeypatch):
  """Test task retry mechanism."""
  scheduler = AutoCron()
 
+ # Record the backoff delays instead of sleeping through them
+ delays = []
+
+ def fake_retry_delay(attempt, base_delay):
+ delays.append(calculate_retry_delay(attempt, base_delay))
+ return 0
+
+ monkeypatch.setattr(scheduler_module, "calculate_retry_delay", fake_retry_delay)
+
  call_count = []
 
  def failing_task():
@@ -117,6 +123,7 @@ class TestIntegration:
  assert len(call_count) == 3
  assert task.run_count == 1
  assert task.fail_count == 2
+ assert delays == [calculate_retry_delay(0, 1), calculate_retry_delay(1, 1)]
 
  def test_config_file_loading(self, temp_dir):
  """Test loading configuration from file."""
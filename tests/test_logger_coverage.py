@@ -12,66 +12,65 @@ Covers:
 
 import os
 
-from autocron.logging.logger import AutoCronLogger
+import pytest
 
+from autocron.logging.logger import AutoCronLogger
 
-class TestLoggerAdditionalCoverage:
- """Additional tests for logger coverage"""
 
- def test_debug_logging(self, tmp_path):
- """Test debug level logging"""
- log_file = tmp_path / "test_debug.log"
+@pytest.fixture(scope="module")
+def shared_logger(tmp_path_factory):
+ """DEBUG-level logger writing to one file for the whole module"""
+ log_file = tmp_path_factory.mktemp("logs") / "shared.log"
  logger = AutoCronLogger(
- name="test_debug",
+ name="test_shared",
  log_path=str(log_file),
  log_level="DEBUG",
  console_output=False,
  )
+ yield logger
+ for handler in logger.logger.handlers[:]:
+ handler.close()
+ logger.logger.removeHandler(handler)
 
- logger.debug("Debug message")
 
- # Verify debug message in log file
- with open(log_file, "r") as f:
- self._extracted_from_test_exception_with_kwargs_15(f, "Debug message", "DEBUG")
+class TestLoggerAdditionalCoverage:
+ """Additional tests for logger coverage"""
 
- def test_critical_logging(self, tmp_path):
- """Test critical level logging"""
- log_file = tmp_path / "test_critical.log"
- logger = AutoCronLogger(
- name="test_critical",
- log_path=str(log_file),
- log_level="INFO",
- console_output=False,
+ @pytest.mark.parametrize(
+ "level, message, extra, needle",
+ [
+ ("debug", "Debug message", None, "DEBUG"),
+ ("critical", "Critical error occurred", None, "CRITICAL"),
+ ("debug", "Debug with context", {"user": "test_user"}, "DEBUG"),
+ ("critical", "Critical with context", {"severity": "high"}, "CRITICAL"),
+ ],
  )
+ def test_level_logging(self, shared_logger, level, message, extra, needle):
+ """Test debug and critical logging, with and without extra kwargs"""
+ offset = os.path.getsize(shared_logger.log_file)
 
- logger.critical("Critical error occurred")
+ getattr(shared_logger, level)(message, extra=extra)
 
- # Verify critical message in log file
- with open(log_file, "r") as f:
- self._extracted_from_test_exception_with_kwargs_15(
- f, "Critical error occurred", "CRITICAL"
- )
+ self._assert_logged(shared_logger, offset, message, needle)
 
- def test_exception_logging(self, tmp_path):
- """Test exception logging with traceback"""
- log_file = tmp_path / "test_exception.log"
- logger = AutoCronLogger(
- name="test_exception",
- log_path=str(log_file),
- log_level="INFO",
- console_output=False,
+ @pytest.mark.parametrize(
+ "error, message, extra",
+ [
+ (ValueError("Test exception"), "Exception occurred", None),
+ (ZeroDivisionError("division by zero"), "Math error", {"operation": "division"}),
+ ],
  )
+ def test_exception_logging(self, shared_logger, error, message, extra):
+ """Test exception logging with traceback, with and without extra kwargs"""
+ offset = os.path.getsize(shared_logger.log_file)
 
  try:
- raise ValueError("Test exception")
- except ValueError:
- logger.exception("Exception occurred")
+ raise error
+ except type(error):
+ shared_logger.exception(message, extra=extra)
 
  # Verify exception and traceback in log file
- with open(log_file, "r") as f:
- self._extracted_from_test_exception_with_kwargs_15(
- f, "Exception occurred", "ValueError"
- )
+ self._assert_logged(shared_logger, offset, message, type(error).__name__, "Traceback")
 
  def test_get_log_file_path(self, tmp_path):
  """Test getting log file path"""
@@ -116,13 +115,18 @@ class TestLoggerAdditionalCoverage:
  console_output=False,
  )
 
- # Write multiple log entries
- for i in range(50):
- logger.info(f"Log entry {i}")
+ # Write multiple log entries in one batch through the file handler's stream
+ handler = logger.logger.handlers[0]
+ handler.stream.write("".join(f"INFO - Log entry {i}\n" for i in range(50)))
+ handler.flush()
 
- # Get only last 10 lines
+ # Get only last 10 lines, reading the file in small blocks
+ logger.TAIL_BLOCK_SIZE = 64
  recent = logger.get_recent_logs(lines=10)
- assert len(recent) <= 10
+ assert [line.rsplit(" - ", 1)[-1] for line in recent] == [
+ f"Log entry {i}\n" for i in range(40, 50)
+ ]
+ assert recent == logger.get_recent_logs(lines=0)[-10:]
 
  def test_clear_logs_success(self, tmp_path):
  """Test clearing log file"""
@@ -151,57 +155,10 @@ class TestLoggerAdditionalCoverage:
  # Should only contain the "Log file cleared" message
  assert "Log file cleared" in content or content == ""
 
- def test_debug_with_kwargs(self, tmp_path):
- """Test debug logging with extra kwargs"""
- log_file = tmp_path / "test_debug_kwargs.log"
- logger = AutoCronLogger(
- name="test_debug_kwargs",
- log_path=str(log_file),
- log_level="DEBUG",
- console_output=False,
- )
-
- logger.debug("Debug with context", extra={"user": "test_user"})
-
- with open(log_file, "r") as f:
- content = f.read()
- assert "Debug with context" in content
-
- def test_critical_with_kwargs(self, tmp_path):
- """Test critical logging with extra kwargs"""
- log_file = tmp_path / "test_critical_kwargs.log"
- logger = AutoCronLogger(
- name="test_critical_kwargs",
- log_path=str(log_file),
- console_output=False,
- )
-
- logger.critical("Critical with context", extra={"severity": "high"})
-
- with open(log_file, "r") as f:
- content = f.read()
- assert "Critical with context" in content
-
- def test_exception_with_kwargs(self, tmp_path):
- """Test exception logging with extra kwargs"""
- log_file = tmp_path / "test_exception_kwargs.log"
- logger = AutoCronLogger(
- name="test_exception_kwargs",
- log_path=str(log_file),
- console_output=False,
- )
-
- try:
- 1 / 0
- except ZeroDivisionError:
- logger.exception("Math error", extra={"operation": "division"})
-
- with open(log_file, "r") as f:
- self._extracted_from_test_exception_with_kwargs_15(f, "Math error", "ZeroDivisionError")
-
- # TODO Rename this here and in `test_debug_logging`, `test_critical_logging`,
- # `test_exception_logging` and `test_exception_with_kwargs`
- def _extracted_from_test_exception_with_kwargs_15(self, f, arg1, arg2):
+ def _assert_logged(self, logger, offset, *expected):
+ """Assert that everything written after offset contains each expected string"""
+ with open(logger.log_file, "r") as f:
+ f.seek(offset)
  content = f.read()
- assert arg1 in content
- assert arg2 in content
+ for text in expected:
+ assert text in content
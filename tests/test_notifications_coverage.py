@@ -8,7 +8,7 @@ Focus areas:
 4. Multi-channel notifications
 """
 
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -20,10 +20,10 @@ from autocron.interface.notifications import (
 )
 
 
+@patch("autocron.interface.notifications.safe_import")
 class TestDesktopNotifier:
  """Test desktop notifications"""
 
- @patch("autocron.interface.notifications.safe_import")
  @patch("plyer.notification")
  def test_desktop_notifier_send_success(self, mock_notification, mock_safe_import):
  """Test successful desktop notification"""
@@ -42,7 +42,6 @@ class TestDesktopNotifier:
  timeout=10,
  )
 
- @patch("autocron.interface.notifications.safe_import")
  @patch("plyer.notification")
  def test_desktop_notifier_send_failure(self, mock_notification, mock_safe_import):
  """Test desktop notification failure"""
@@ -56,7 +55,6 @@ class TestDesktopNotifier:
  with pytest.raises(NotificationError):
  notifier.send("Title", "Message")
 
- @patch("autocron.interface.notifications.safe_import")
  def test_desktop_notifier_without_plyer(self, mock_safe_import):
  """Test desktop notifier when plyer not available"""
  mock_safe_import.return_value = None
@@ -66,40 +64,54 @@ class TestDesktopNotifier:
  DesktopNotifier()
 
 
-class TestEmailNotifier:
- """Test email notifications"""
-
- def test_email_notifier_initialization(self):
- """Test email notifier initialization"""
- config = {
+_BASE_CFG = {
  "smtp_server": "smtp.gmail.com",
  "smtp_port": 587,
  "from_email": "sender@example.com",
  "password": "testpass",
  "to_email": "recipient@example.com",
- }
+}
 
- notifier = EmailNotifier(config)
+
+def _mock_notifier():
+ """Create a notifier mock limited to the send() API"""
+ return Mock(spec=["send"], **{"send.return_value": True})
+
+
+@pytest.fixture(scope="module")
+def smtp():
+ """Patch smtplib.SMTP once for the module and yield the mock and its server"""
+ with patch("smtplib.SMTP") as mock_smtp:
+ mock_server = Mock(spec=["starttls", "login", "sendmail", "quit"])
+ mock_smtp.return_value.__enter__.return_value = mock_server
+ yield mock_smtp, mock_server
+
+
+class TestEmailNotifier:
+ """Test email notifications"""
+
+ @pytest.fixture(autouse=True)
+ def reset_smtp(self, smtp):
+ """Clear recorded calls and side effects between tests"""
+ yield
+ mock_smtp, mock_server = smtp
+ mock_smtp.reset_mock(return_value=False, side_effect=True)
+ mock_server.reset_mock(side_effect=True)
+ mock_server.login.reset_mock(side_effect=True)
+
+ def test_email_notifier_initialization(self):
+ """Test email notifier initialization"""
+ notifier = EmailNotifier(_BASE_CFG)
  assert notifier.smtp_server == "smtp.gmail.com"
  assert notifier.smtp_port == 587
  assert notifier.from_email == "sender@example.com"
  assert notifier.to_email == "recipient@example.com"
 
- @patch("smtplib.SMTP")
- def test_email_notifier_send_success(self, mock_smtp):
+ def test_email_notifier_send_success(self, smtp):
  """Test successful email sending"""
- config = {
- "smtp_server": "smtp.gmail.com",
- "smtp_port": 587,
- "from_email": "sender@example.com",
- "password": "testpass",
- "to_email": "recipient@example.com",
- }
-
- mock_server = MagicMock()
- mock_smtp.return_value.__enter__.return_value = mock_server
+ mock_smtp, mock_server = smtp
 
- notifier = EmailNotifier(config)
+ notifier = EmailNotifier(_BASE_CFG)
  result = notifier.send("Test Subject", "Test body")
 
  assert result is True
@@ -108,54 +120,33 @@ class TestEmailNotifier:
  mock_server.login.assert_called_once_with("sender@example.com", "testpass")
  mock_server.sendmail.assert_called_once()
 
- @patch("smtplib.SMTP")
- def test_email_notifier_send_failure(self, mock_smtp):
+ def test_email_notifier_send_failure(self, smtp):
  """Test email sending failure"""
- config = {
- "smtp_server": "smtp.gmail.com",
- "smtp_port": 587,
- "from_email": "sender@example.com",
- "password": "testpass",
- "to_email": "recipient@example.com",
- }
-
+ mock_smtp, _ = smtp
  mock_smtp.side_effect = Exception("SMTP connection failed")
 
- notifier = EmailNotifier(config)
+ notifier = EmailNotifier(_BASE_CFG)
 
  # Should raise NotificationError
  with pytest.raises(NotificationError):
  notifier.send("Subject", "Body")
 
- @patch("smtplib.SMTP")
- def test_email_notifier_authentication_failure(self, mock_smtp):
+ def test_email_notifier_authentication_failure(self, smtp):
  """Test email authentication failure"""
- config = {
- "smtp_server": "smtp.gmail.com",
- "smtp_port": 587,
- "from_email": "sender@example.com",
- "password": "wrongpass",
- "to_email": "recipient@example.com",
- }
-
- mock_server = MagicMock()
+ _, mock_server = smtp
  mock_server.login.side_effect = Exception("Authentication failed")
- mock_smtp.return_value.__enter__.return_value = mock_server
 
- notifier = EmailNotifier(config)
+ notifier = EmailNotifier({**_BASE_CFG, "password": "wrongpass"})
 
  # Should raise NotificationError
  with pytest.raises(NotificationError):
  notifier.send("Subject", "Body")
 
- @patch("smtplib.SMTP")
- def test_email_notifier_multiple_recipients(self, mock_smtp):
+ def test_email_notifier_multiple_recipients(self, smtp):
  """Test sending email to multiple recipients"""
+ _, mock_server = smtp
  config = {
- "smtp_server": "smtp.gmail.com",
- "smtp_port": 587,
- "from_email": "sender@example.com",
- "password": "testpass",
+ **_BASE_CFG,
  "to_email": [
  "recipient1@example.com",
  "recipient2@example.com",
@@ -163,9 +154,6 @@ class TestEmailNotifier:
  ],
  }
 
- mock_server = MagicMock()
- mock_smtp.return_value.__enter__.return_value = mock_server
-
  notifier = EmailNotifier(config)
  result = notifier.send("Multi-recipient Test", "Body")
 
@@ -177,54 +165,46 @@ class TestEmailNotifier:
 class TestNotificationManager:
  """Test notification manager"""
 
- def test_notification_manager_add_notifier(self):
+ @pytest.fixture
+ def manager(self):
+ """Create a notification manager"""
+ return NotificationManager()
+
+ def test_notification_manager_add_notifier(self, manager):
  """Test adding notifiers to manager"""
- manager = NotificationManager()
- notifier = Mock()
+ notifier = _mock_notifier()
 
  manager.add_notifier("test", notifier)
  assert "test" in manager.notifiers
 
- def test_notification_manager_setup_desktop(self):
+ def test_notification_manager_setup_desktop(self, manager):
  """Test setting up desktop notifications"""
- manager = NotificationManager()
  manager.setup_desktop()
 
  assert "desktop" in manager.notifiers
  assert isinstance(manager.notifiers["desktop"], DesktopNotifier)
 
- def test_notification_manager_setup_email(self):
+ def test_notification_manager_setup_email(self, manager):
  """Test setting up email notifications"""
- config = {
- "smtp_server": "smtp.gmail.com",
- "smtp_port": 587,
- "from_email": "sender@example.com",
- "password": "testpass",
- "to_email": "recipient@example.com",
- }
-
- manager = NotificationManager()
- manager.setup_email(config)
+ manager.setup_email(_BASE_CFG)
 
  assert "email" in manager.notifiers
  assert isinstance(manager.notifiers["email"], EmailNotifier)
 
- def test_notification_manager_notify_single_channel(self):
+ def test_notification_manager_notify_single_channel(self, manager):
  """Test notifying through single channel"""
- manager = NotificationManager()
- mock_notifier = Mock()
+ mock_notifier = _mock_notifier()
  manager.add_notifier("test", mock_notifier)
 
  manager.notify("Test Title", "Test message", channels=["test"])
 
  mock_notifier.send.assert_called_once_with("Test Title", "Test message")
 
- def test_notification_manager_notify_multiple_channels(self):
+ def test_notification_manager_notify_multiple_channels(self, manager):
  """Test notifying through multiple channels"""
- manager = NotificationManager()
 
- mock_notifier1 = Mock()
- mock_notifier2 = Mock()
+ mock_notifier1 = _mock_notifier()
+ mock_notifier2 = _mock_notifier()
 
  manager.add_notifier("channel1", mock_notifier1)
  manager.add_notifier("channel2", mock_notifier2)
@@ -234,28 +214,25 @@ class TestNotificationManager:
  mock_notifier1.send.assert_called_once_with("Title", "Message")
  mock_notifier2.send.assert_called_once_with("Title", "Message")
 
- def test_notification_manager_notify_unknown_channel(self):
+ def test_notification_manager_notify_unknown_channel(self, manager):
  """Test notifying through unknown channel"""
- manager = NotificationManager()
 
  # Should not raise, just log warning
  manager.notify("Title", "Message", channels=["unknown"])
 
- def test_notification_manager_notify_with_exception(self):
+ def test_notification_manager_notify_with_exception(self, manager):
  """Test notification when notifier raises exception"""
- manager = NotificationManager()
 
- mock_notifier = Mock()
+ mock_notifier = _mock_notifier()
  mock_notifier.send.side_effect = Exception("Send failed")
  manager.add_notifier("faulty", mock_notifier)
 
  # Should not raise, exception caught
  manager.notify("Title", "Message", channels=["faulty"])
 
- def test_notification_manager_task_success(self):
+ def test_notification_manager_task_success(self, manager):
  """Test task success notification"""
- manager = NotificationManager()
- mock_notifier = Mock()
+ mock_notifier = _mock_notifier()
  manager.add_notifier("test", mock_notifier)
 
  manager.notify_task_success("test_task", 1.5, channels=["test"])
@@ -266,10 +243,9 @@ class TestNotificationManager:
  assert "test_task" in args[1]
  assert "1.5" in args[1] or "1.50" in args[1]
 
- def test_notification_manager_task_failure(self):
+ def test_notification_manager_task_failure(self, manager):
  """Test task failure notification"""
- manager = NotificationManager()
- mock_notifier = Mock()
+ mock_notifier = _mock_notifier()
  manager.add_notifier("test", mock_notifier)
 
  manager.notify_task_failure(
@@ -287,10 +263,9 @@ class TestNotificationManager:
  assert "Test error" in args[1]
  assert "2" in args[1]
 
- def test_notification_manager_scheduler_error(self):
+ def test_notification_manager_scheduler_error(self, manager):
  """Test scheduler error notification"""
- manager = NotificationManager()
- mock_notifier = Mock()
+ mock_notifier = _mock_notifier()
  manager.add_notifier("test", mock_notifier)
 
  manager.notify_scheduler_error("Critical error", channels=["test"])
@@ -306,8 +281,7 @@ class TestNotificationIntegration:
  def test_notification_with_no_channels(self):
  """Test notification when no channels specified"""
  manager = NotificationManager()
- mock_notifier = Mock()
- mock_notifier.send.return_value = True
+ mock_notifier = _mock_notifier()
  manager.add_notifier("test", mock_notifier)
 
  # channels=None means use all available channels
@@ -323,6 +297,7 @@ class TestNotificationIntegration:
  mock_notifier.send.assert_not_called()
  assert result == {}
 
+ @pytest.mark.xdist_group("notif_singleton")
  def test_notification_manager_singleton_pattern(self):
  """Test notification manager singleton behavior"""
  from autocron.interface.notifications import (
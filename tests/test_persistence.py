@@ -1,30 +1,53 @@
 """Tests for task persistence (save/load functionality)."""
 
 import json
-import os
-import tempfile
+from datetime import datetime
 from pathlib import Path
 
 import pytest
 import yaml
 
-from autocron.core.scheduler import AutoCron, SchedulingError
+from autocron.core.scheduler import SchedulingError
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Saved-task record; tests override the fields they care about
+_TASK_TEMPLATE = {
+ "task_id": "test-id-1",
+ "name": "task1",
+ "schedule_type": "interval",
+ "schedule_value": "5m",
+ "retries": 0,
+ "retry_delay": 60,
+ "timeout": None,
+ "notify": None,
+ "email_config": None,
+ "enabled": True,
+ "last_run": None,
+ "next_run": None,
+ "run_count": 0,
+ "fail_count": 0,
+}
+
+
+def _write_tasks_file(path, *tasks):
+ """Write a task file in the format given by the path's suffix."""
+ tasks_data = {"version": "1.0", "saved_at": "2025-10-27T12:00:00", "tasks": list(tasks)}
+ with open(path, "w") as f:
+ if path.suffix == ".json":
+ json.dump(tasks_data, f)
+ else:
+ yaml.dump(tasks_data, f, Dumper=_YAML_DUMPER)
 
 
 class TestTaskPersistence:
  """Test task save and load functionality."""
 
  @pytest.fixture
- def scheduler(self):
+ def scheduler(self, scheduler_factory):
  """Create a scheduler instance."""
- return AutoCron()
-
- @pytest.fixture
- def test_script(self, tmp_path):
- """Create a test script."""
- script = tmp_path / "test_script.py"
- script.write_text("print('Hello from script')\n")
- return str(script)
+ return scheduler_factory()
 
  def test_save_tasks_yaml(self, scheduler, test_script, tmp_path):
  """Test saving tasks to YAML file."""
@@ -41,7 +64,7 @@ class TestTaskPersistence:
 
  # Verify YAML content
  with open(save_path, "r") as f:
- data = yaml.safe_load(f)
+ data = yaml.load(f, Loader=_YAML_LOADER) # nosec B506
 
  assert "version" in data
  assert "saved_at" in data
@@ -96,7 +119,7 @@ class TestTaskPersistence:
  # Cleanup
  expected_path.unlink()
 
- def test_save_tasks_skips_function_tasks(self, scheduler, test_script):
+ def test_save_tasks_skips_function_tasks(self, scheduler, test_script, tmp_path):
  """Test that function-based tasks are skipped during save."""
  # Add script task
  scheduler.add_task(name="script_task", script=test_script, every="5m")
@@ -108,22 +131,16 @@ class TestTaskPersistence:
  scheduler.add_task(name="func_task", func=my_func, every="10m")
 
  # Save tasks
- with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
- temp_path = f.name
-
- try:
- scheduler.save_tasks(temp_path)
+ temp_path = tmp_path / "tasks.yaml"
+ scheduler.save_tasks(str(temp_path))
 
  # Verify only script task was saved
  with open(temp_path, "r") as f:
- data = yaml.safe_load(f)
+ data = yaml.load(f, Loader=_YAML_LOADER) # nosec B506
 
  assert len(data["tasks"]) == 1
  assert data["tasks"][0]["name"] == "script_task"
 
- finally:
- os.unlink(temp_path)
-
  def test_save_tasks_unsupported_format(self, scheduler, test_script):
  """Test saving tasks with unsupported format."""
  scheduler.add_task(name="task1", script=test_script, every="5m")
@@ -131,36 +148,28 @@ class TestTaskPersistence:
  with pytest.raises(SchedulingError, match="Unsupported file format"):
  scheduler.save_tasks("tasks.txt")
 
- def test_load_tasks_yaml(self, scheduler, test_script, tmp_path):
- """Test loading tasks from YAML file."""
- # Create YAML file
- tasks_data = {
- "version": "1.0",
- "saved_at": "2025-10-27T12:00:00",
- "tasks": [
+ @pytest.mark.parametrize(
+ "suffix, overrides",
+ [
+ (".yaml", {"retries": 2}),
+ (".json", {"schedule_type": "cron", "schedule_value": "0 * * * *"}),
+ (
+ ".yaml",
  {
- "task_id": "test-id-1",
- "name": "task1",
- "script": test_script,
- "schedule_type": "interval",
- "schedule_value": "5m",
- "retries": 2,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": None,
- "next_run": None,
- "run_count": 0,
- "fail_count": 0,
- }
+ "last_run": "2025-10-27T11:00:00",
+ "next_run": "2025-10-27T11:05:00",
+ "run_count": 10,
+ "fail_count": 2,
+ },
+ ),
  ],
- }
-
- load_path = tmp_path / "tasks.yaml"
- with open(load_path, "w") as f:
- yaml.dump(tasks_data, f)
+ ids=["yaml", "json", "with_state"],
+ )
+ def test_load_single_task(self, scheduler, test_script, tmp_path, suffix, overrides):
+ """Test loading one task from YAML or JSON, with and without execution state."""
+ record = {**_TASK_TEMPLATE, "script": test_script, **overrides}
+ load_path = tmp_path / f"tasks{suffix}"
+ _write_tasks_file(load_path, record)
 
  # Load tasks
  count = scheduler.load_tasks(str(load_path))
@@ -170,90 +179,58 @@ class TestTaskPersistence:
 
  task = scheduler.get_task(name="task1")
  assert task is not None
- assert task.name == "task1"
  assert task.script == test_script
- assert task.schedule_type == "interval"
- assert task.schedule_value == "5m"
- assert task.retries == 2
-
- def test_load_tasks_json(self, scheduler, test_script, tmp_path):
- """Test loading tasks from JSON file."""
- # Create JSON file
+ for field in ["schedule_type", "schedule_value", "retries", "run_count", "fail_count"]:
+ assert getattr(task, field) == record[field]
+ # sourcery skip: no-conditionals-in-tests
+ if "last_run" in overrides:
+ assert task.last_run == datetime.fromisoformat(record["last_run"])
+ assert task.next_run == datetime.fromisoformat(record["next_run"])
+
+ def test_load_tasks_prefers_epoch_fields(self, scheduler, test_script, tmp_path):
+ """Test that epoch run times are used without parsing the ISO strings."""
  tasks_data = {
  "version": "1.0",
  "saved_at": "2025-10-27T12:00:00",
  "tasks": [
  {
- "task_id": "test-id-1",
  "name": "task1",
  "script": test_script,
- "schedule_type": "cron",
- "schedule_value": "0 * * * *",
- "retries": 0,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": None,
- "next_run": None,
- "run_count": 0,
- "fail_count": 0,
+ "schedule_type": "interval",
+ "schedule_value": "5m",
+ "last_run": "not an ISO timestamp",
+ "next_run": "not an ISO timestamp",
+ "last_run_epoch": 1761559200.0,
+ "next_run_epoch": 1761559500.0,
  }
  ],
  }
-
  load_path = tmp_path / "tasks.json"
- with open(load_path, "w") as f:
- json.dump(tasks_data, f)
+ load_path.write_text(json.dumps(tasks_data))
 
- # Load tasks
- count = scheduler.load_tasks(str(load_path))
-
- assert count == 1
+ assert scheduler.load_tasks(str(load_path)) == 1
  task = scheduler.get_task(name="task1")
- assert task.schedule_type == "cron"
- assert task.schedule_value == "0 * * * *"
-
- def test_load_tasks_with_state(self, scheduler, test_script, tmp_path):
- """Test loading tasks with execution state."""
- # Create tasks with state
- tasks_data = {
- "version": "1.0",
- "saved_at": "2025-10-27T12:00:00",
- "tasks": [
- {
- "task_id": "test-id-1",
- "name": "task1",
- "script": test_script,
- "schedule_type": "interval",
- "schedule_value": "5m",
- "retries": 0,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": "2025-10-27T11:00:00",
- "next_run": "2025-10-27T11:05:00",
- "run_count": 10,
- "fail_count": 2,
- }
- ],
- }
+ assert task.last_run == datetime.fromtimestamp(1761559200.0)
+ assert task.next_run == datetime.fromtimestamp(1761559500.0)
+
+ def test_load_tasks_skips_schedule_evaluation(
+ self, scheduler, scheduler_factory, test_script, tmp_path, monkeypatch
+ ):
+ """Test that a saved next_run is restored without evaluating the cron schedule."""
+ scheduler.add_task(name="task1", script=test_script, cron="0 * * * *")
+ save_path = tmp_path / "tasks.json"
+ scheduler.save_tasks(str(save_path))
 
- load_path = tmp_path / "tasks.yaml"
- with open(load_path, "w") as f:
- yaml.dump(tasks_data, f)
+ from autocron.core import scheduler as scheduler_module
 
- # Load tasks
- scheduler.load_tasks(str(load_path))
+ def fail(*args):
+ raise AssertionError("schedule evaluated on load")
 
- task = scheduler.get_task(name="task1")
- assert task.run_count == 10
- assert task.fail_count == 2
- assert task.last_run is not None
- assert task.next_run is not None
+ monkeypatch.setattr(scheduler_module, "get_next_run_time", fail)
+ new_scheduler = scheduler_factory()
+ assert new_scheduler.load_tasks(str(save_path)) == 1
+ restored = new_scheduler.get_task(name="task1")
+ assert restored.next_run == scheduler.get_task(name="task1").next_run
 
  def test_load_tasks_merge_with_existing(self, scheduler, test_script, tmp_path):
  """Test loading tasks merges with existing tasks."""
@@ -261,33 +238,11 @@ class TestTaskPersistence:
  scheduler.add_task(name="existing_task", script=test_script, every="5m")
 
  # Create file with new task
- tasks_data = {
- "version": "1.0",
- "saved_at": "2025-10-27T12:00:00",
- "tasks": [
- {
- "task_id": "test-id-1",
- "name": "new_task",
- "script": test_script,
- "schedule_type": "interval",
- "schedule_value": "10m",
- "retries": 0,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": None,
- "next_run": None,
- "run_count": 0,
- "fail_count": 0,
- }
- ],
- }
-
- load_path = tmp_path / "tasks.yaml"
- with open(load_path, "w") as f:
- yaml.dump(tasks_data, f)
+ load_path = tmp_path / "tasks.json"
+ _write_tasks_file(
+ load_path,
+ {**_TASK_TEMPLATE, "name": "new_task", "script": test_script, "schedule_value": "10m"},
+ )
 
  # Load tasks (merge mode)
  count = scheduler.load_tasks(str(load_path), replace=False)
@@ -304,33 +259,11 @@ class TestTaskPersistence:
  scheduler.add_task(name="task2", script=test_script, every="10m")
 
  # Create file with different task
- tasks_data = {
- "version": "1.0",
- "saved_at": "2025-10-27T12:00:00",
- "tasks": [
- {
- "task_id": "test-id-1",
- "name": "task3",
- "script": test_script,
- "schedule_type": "interval",
- "schedule_value": "15m",
- "retries": 0,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": None,
- "next_run": None,
- "run_count": 0,
- "fail_count": 0,
- }
- ],
- }
-
- load_path = tmp_path / "tasks.yaml"
- with open(load_path, "w") as f:
- yaml.dump(tasks_data, f)
+ load_path = tmp_path / "tasks.json"
+ _write_tasks_file(
+ load_path,
+ {**_TASK_TEMPLATE, "name": "task3", "script": test_script, "schedule_value": "15m"},
+ )
 
  # Load tasks (replace mode)
  count = scheduler.load_tasks(str(load_path), replace=True)
@@ -347,33 +280,9 @@ class TestTaskPersistence:
  scheduler.add_task(name="task1", script=test_script, every="5m")
 
  # Create file with same task name
- tasks_data = {
- "version": "1.0",
- "saved_at": "2025-10-27T12:00:00",
- "tasks": [
- {
- "task_id": "test-id-1",
- "name": "task1", # Duplicate name
- "script": test_script,
- "schedule_type": "interval",
- "schedule_value": "10m",
- "retries": 0,
- "retry_delay": 60,
- "timeout": None,
- "notify": None,
- "email_config": None,
- "enabled": True,
- "last_run": None,
- "next_run": None,
- "run_count": 0,
- "fail_count": 0,
- }
- ],
- }
-
- load_path = tmp_path / "tasks.yaml"
- with open(load_path, "w") as f:
- yaml.dump(tasks_data, f)
+ load_path = tmp_path / "tasks.json"
+ duplicate = {**_TASK_TEMPLATE, "script": test_script, "schedule_value": "10m"}
+ _write_tasks_file(load_path, duplicate)
 
  # Load tasks (merge mode)
  count = scheduler.load_tasks(str(load_path), replace=False)
@@ -391,7 +300,7 @@ class TestTaskPersistence:
  # Create invalid file
  load_path = tmp_path / "invalid.yaml"
  with open(load_path, "w") as f:
- yaml.dump({"invalid": "data"}, f)
+ yaml.dump({"invalid": "data"}, f, Dumper=_YAML_DUMPER)
 
  with pytest.raises(SchedulingError, match="Invalid task file format"):
  scheduler.load_tasks(str(load_path))
@@ -405,7 +314,7 @@ class TestTaskPersistence:
  with pytest.raises(SchedulingError, match="Unsupported file format"):
  scheduler.load_tasks(str(load_path))
 
- def test_save_and_load_roundtrip(self, scheduler, test_script, tmp_path):
+ def test_save_and_load_roundtrip(self, scheduler, scheduler_factory, test_script, tmp_path):
  """Test full save and load roundtrip."""
  # Add tasks
  scheduler.add_task(name="task1", script=test_script, every="5m", retries=2)
@@ -416,7 +325,7 @@ class TestTaskPersistence:
  scheduler.save_tasks(str(save_path))
 
  # Create new scheduler and load tasks
- new_scheduler = AutoCron()
+ new_scheduler = scheduler_factory()
  count = new_scheduler.load_tasks(str(save_path))
 
  assert count == 2
@@ -431,3 +340,61 @@ class TestTaskPersistence:
  task2 = new_scheduler.get_task(name="task2")
  assert task2.schedule_value == "0 * * * *"
  assert task2.timeout == 300
+
+ @pytest.mark.parametrize("use_orjson", [True, False])
+ def test_json_roundtrip_preserves_run_times(
+ self, scheduler, scheduler_factory, test_script, tmp_path, monkeypatch, use_orjson
+ ):
+ """Test that JSON files round-trip run times with and without orjson."""
+ from autocron.core import scheduler as scheduler_module
+
+ if use_orjson and not scheduler_module.ORJSON_AVAILABLE:
+ pytest.skip("orjson not installed")
+ monkeypatch.setattr(scheduler_module, "ORJSON_AVAILABLE", use_orjson)
+
+ scheduler.add_task(name="task1", script=test_script, every="5m")
+ task = scheduler.get_task(name="task1")
+ save_path = tmp_path / "tasks.json"
+ scheduler.save_tasks(str(save_path))
+
+ data = json.loads(save_path.read_text())
+ assert data["tasks"][0]["next_run_epoch"] == task.next_run.timestamp()
+ assert "\n " in save_path.read_text()
+
+ new_scheduler = scheduler_factory()
+ new_scheduler.load_tasks(str(save_path))
+ assert new_scheduler.get_task(name="task1").next_run == task.next_run
+
+ def test_load_tasks_yaml_reads_utf8_bytes(self, scheduler, test_script, tmp_path):
+ """Test that YAML task files are decoded as UTF-8 regardless of locale."""
+ tasks_data = {
+ "version": "1.0",
+ "tasks": [
+ {
+ "name": "résumé-backup",
+ "script": test_script,
+ "schedule_type": "interval",
+ "schedule_value": "5m",
+ }
+ ],
+ }
+ load_path = tmp_path / "tasks.yaml"
+ payload = yaml.dump(tasks_data, Dumper=_YAML_DUMPER, allow_unicode=True)
+ load_path.write_bytes(payload.encode("utf-8"))
+
+ assert scheduler.load_tasks(str(load_path)) == 1
+ assert scheduler.get_task(name="résumé-backup") is not None
+
+ def test_save_tasks_yaml_keeps_unicode_readable(
+ self, scheduler, scheduler_factory, test_script, tmp_path
+ ):
+ """Test that non-ASCII task names are written as UTF-8, not escaped."""
+ scheduler.add_task(name="résumé-backup", script=test_script, every="5m")
+ save_path = tmp_path / "tasks.yaml"
+
+ scheduler.save_tasks(str(save_path))
+
+ assert "name: résumé-backup" in save_path.read_bytes().decode("utf-8")
+ new_scheduler = scheduler_factory()
+ assert new_scheduler.load_tasks(str(save_path)) == 1
+ assert new_scheduler.get_task(name="résumé-backup") is not None
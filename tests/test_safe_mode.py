@@ -2,47 +2,50 @@
 Tests for safe mode execution with resource limits and sandboxing.
 """
 
-import contextlib
 import os
-import tempfile
+import sys
 
 import pytest
 
-from autocron import AutoCron
+from autocron.core import scheduler as scheduler_module
 
 
 @pytest.fixture
-def scheduler():
+def scheduler(scheduler_factory):
  """Create scheduler instance."""
- return AutoCron()
+ return scheduler_factory()
 
 
 @pytest.fixture
-def safe_script():
+def no_cgroup(monkeypatch):
+ """Force the rlimit path even on hosts with cgroup v2."""
+ monkeypatch.setattr(scheduler_module, "_create_run_cgroup", lambda *args: None)
+
+
+@pytest.fixture(scope="module")
+def script_dir(tmp_path_factory):
+ """Create one directory for the scripts shared by this module."""
+ return tmp_path_factory.mktemp("safe_mode_scripts")
+
+
+@pytest.fixture(scope="module")
+def safe_script(script_dir):
  """Create a safe test script."""
- with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
- f.write(
+ script_path = script_dir / "safe_script.py"
+ script_path.write_text(
  """
-import time
 print("Safe script executing...")
-time.sleep(0.1)
 print("Completed successfully")
 """
  )
- script_path = f.name
-
- yield script_path
+ return str(script_path)
 
- # Cleanup
- with contextlib.suppress(Exception):
- os.unlink(script_path)
 
-
-@pytest.fixture
-def memory_hog_script():
+@pytest.fixture(scope="module")
+def memory_hog_script(script_dir):
  """Create a script that uses excessive memory."""
- with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
- f.write(
+ script_path = script_dir / "memory_hog_script.py"
+ script_path.write_text(
  """
 # Try to allocate large amount of memory
 data = []
@@ -50,32 +53,22 @@ for i in range(10000000):
  data.append([0] * 1000)
 """
  )
- script_path = f.name
-
- yield script_path
+ return str(script_path)
 
- with contextlib.suppress(Exception):
- os.unlink(script_path)
 
-
-@pytest.fixture
-def slow_script():
+@pytest.fixture(scope="module")
+def slow_script(script_dir):
  """Create a script that takes too long."""
- with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
- f.write(
+ script_path = script_dir / "slow_script.py"
+ script_path.write_text(
  """
 import time
 print("Starting slow operation...")
-time.sleep(60) # Will timeout before this
+time.sleep(5) # Will timeout before this
 print("Should never reach here")
 """
  )
- script_path = f.name
-
- yield script_path
-
- with contextlib.suppress(Exception):
- os.unlink(script_path)
+ return str(script_path)
 
 
 def test_safe_mode_basic_execution(scheduler, safe_script):
@@ -114,7 +107,9 @@ def test_safe_mode_with_memory_limit(scheduler, safe_script):
  assert task.run_count == 1
 
 
-@pytest.mark.skipif(os.name == "nt", reason="Resource limits work differently on Windows")
+@pytest.mark.skipif(
+ os.name == "nt", reason="Job Object memory limit not yet verified on a Windows CI run"
+)
 def test_safe_mode_memory_violation(scheduler, memory_hog_script):
  """Test that memory limits are enforced."""
  task_id = scheduler.add_task(
@@ -140,7 +135,7 @@ def test_safe_mode_timeout(scheduler, slow_script):
  script=slow_script,
  every="1h",
  safe_mode=True,
- timeout=2, # 2 second timeout
+ timeout=1, # 1 second timeout
  )
 
  task = scheduler.tasks[task_id]
@@ -163,7 +158,7 @@ def test_safe_mode_isolation(scheduler, safe_script):
  assert task.safe_mode is True
 
 
-def test_safe_mode_persistence(scheduler, safe_script, tmp_path):
+def test_safe_mode_persistence(scheduler, scheduler_factory, safe_script, tmp_path):
  """Test that safe mode settings are persisted."""
  _ = scheduler.add_task(
  name="persistent_safe_task",
@@ -179,11 +174,11 @@ def test_safe_mode_persistence(scheduler, safe_script, tmp_path):
  scheduler.save_tasks(str(save_path))
 
  # Load into new scheduler
- new_scheduler = AutoCron()
+ new_scheduler = scheduler_factory()
  new_scheduler.load_tasks(str(save_path))
 
  # Verify safe mode settings
- loaded_task = list(new_scheduler.tasks.values())[0]
+ loaded_task = next(iter(new_scheduler.tasks.values()))
  assert loaded_task.safe_mode is True
  assert loaded_task.max_memory_mb == 256
  assert loaded_task.max_cpu_percent == 50
@@ -208,23 +203,21 @@ def test_normal_mode_still_works(scheduler, safe_script):
  assert task.fail_count == 0
 
 
-def test_safe_mode_output_sanitization(scheduler, safe_script):
+def test_safe_mode_output_sanitization(scheduler, script_dir):
  """Test that output is sanitized in safe mode."""
  # Create script with large output
- with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
- f.write(
+ large_output_script = script_dir / "large_output_script.py"
+ large_output_script.write_text(
  """
 # Generate large output
 for i in range(1000):
  print(f"Line {i}: {'x' * 100}")
 """
  )
- large_output_script = f.name
 
- try:
  task_id = scheduler.add_task(
  name="large_output_task",
- script=large_output_script,
+ script=str(large_output_script),
  every="1h",
  safe_mode=True,
  timeout=5,
@@ -236,10 +229,6 @@ for i in range(1000):
  # Output should be truncated (tested internally in _execute_in_safe_mode)
  assert task.run_count == 1
 
- finally:
- with contextlib.suppress(Exception):
- os.unlink(large_output_script)
-
 
 def test_safe_mode_default_disabled(scheduler, safe_script):
  """Test that safe mode is disabled by default."""
@@ -281,3 +270,116 @@ def test_safe_mode_function_tasks_unsupported(scheduler):
  # Function tasks don't execute in safe mode (they run in-process)
  assert task.safe_mode is True # Setting accepted
  assert task.func is not None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Resource limits work differently on Windows")
+def test_safe_mode_limits_applied_to_child(scheduler, tmp_path, no_cgroup):
+ """Test that the memory and CPU limits are in effect inside the script."""
+ script = tmp_path / "limits.py"
+ script.write_text(
+ "import resource\n"
+ "print(resource.getrlimit(resource.RLIMIT_AS)[0])\n"
+ "print(resource.getrlimit(resource.RLIMIT_CPU)[0])\n"
+ )
+
+ output = scheduler._execute_in_safe_mode(
+ str(script), timeout=5, max_memory_mb=512, max_cpu_percent=None
+ )
+
+ assert output.split() == [str(512 * 1024 * 1024), "5"]
+
+
+def test_safe_mode_output_truncated(scheduler, tmp_path):
+ """Test that only the first part of large script output is returned."""
+ script = tmp_path / "chatty.py"
+ script.write_text("import sys\nsys.stdout.write('é' * 2_000_000)\n")
+
+ output = scheduler._execute_in_safe_mode(
+ str(script), timeout=10, max_memory_mb=None, max_cpu_percent=None
+ )
+
+ assert output == "é" * scheduler.SAFE_MODE_OUTPUT_LIMIT + "\n... (output truncated)"
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="Requires CPU affinity support")
+def test_safe_mode_cpu_percent_limits_cores(scheduler, tmp_path, no_cgroup):
+ """Test that max_cpu_percent restricts the script to a share of the cores."""
+ script = tmp_path / "cores.py"
+ script.write_text("import os\nprint(len(os.sched_getaffinity(0)))\n")
+
+ output = scheduler._execute_in_safe_mode(
+ str(script), timeout=5, max_memory_mb=None, max_cpu_percent=1
+ )
+
+ assert output.strip() == "1"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are Linux-only")
+def _fake_cgroup(tmp_path, monkeypatch, own="/system.slice/app.service"):
+ """Point the scheduler at a fake cgroup v2 mount with the process in ``own``."""
+ root = tmp_path / "cgroup"
+ root.mkdir()
+ (root / "cgroup.controllers").write_text("cpu memory\n")
+ parent = root / own.lstrip("/")
+ parent.mkdir(parents=True, exist_ok=True)
+ (parent / "cgroup.controllers").write_text("cpu io memory pids\n")
+ (parent / "cgroup.subtree_control").write_text("\n")
+ (parent / "cgroup.procs").write_text(f"{os.getpid()}\n")
+ proc_self = tmp_path / "proc_self_cgroup"
+ proc_self.write_text(f"0::{own}\n")
+ monkeypatch.setattr(scheduler_module, "_CGROUP_ROOT", root)
+ monkeypatch.setattr(scheduler_module, "_PROC_SELF_CGROUP", proc_self)
+ scheduler_module._ensure_autocron_cgroup.cache_clear()
+ return root, parent
+
+
+def test_safe_mode_uses_cgroup_v2(scheduler, tmp_path, monkeypatch):
+ """Test that with cgroup v2 the limits are set on a per-run cgroup the script joins."""
+ import resource
+
+ root, parent = _fake_cgroup(tmp_path, monkeypatch)
+ monkeypatch.setattr(scheduler_module, "_cgroup_is_delegated", lambda group: True)
+ monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+ script = tmp_path / "limits.py"
+ script.write_text(
+ "import os, resource\n"
+ "print(os.getpid())\n"
+ "print(resource.getrlimit(resource.RLIMIT_AS)[0])\n"
+ )
+
+ try:
+ output = scheduler._execute_in_safe_mode(
+ str(script), timeout=5, max_memory_mb=256, max_cpu_percent=25
+ )
+ finally:
+ scheduler_module._ensure_autocron_cgroup.cache_clear()
+
+ # The scheduler moves into a leaf of its own group, which then hands out the
+ # controllers; nothing above that group is touched
+ assert not (root / "cgroup.subtree_control").exists()
+ assert (parent / "autocron-scheduler" / "cgroup.procs").read_text() == str(os.getpid())
+ assert (parent / "cgroup.subtree_control").read_text() == "+cpu +memory"
+ # A real cgroupfs removes the group on rmdir; here its files are left to inspect
+ (group,) = list(parent.glob("autocron-run-*"))
+ pid, memory_limit = output.split()
+ assert (group / "cgroup.procs").read_text() == pid
+ assert (group / "memory.max").read_text() == str(256 * 1024 * 1024)
+ assert (group / "cpu.max").read_text() == "50000 100000" # 25% of two cores
+ # The cgroup replaces the address-space rlimit
+ assert int(memory_limit) == resource.getrlimit(resource.RLIMIT_AS)[0]
+
+
+@pytest.mark.parametrize("own", ["/", "/system.slice/app.service"])
+def test_cgroup_needs_a_delegated_non_root_group(tmp_path, monkeypatch, own):
+ """Test that without a delegated group of its own the scheduler leaves cgroups alone."""
+ root, parent = _fake_cgroup(tmp_path, monkeypatch, own)
+ # The root group never qualifies, even if it looks delegated
+ monkeypatch.setattr(scheduler_module, "_cgroup_is_delegated", lambda group: own == "/")
+
+ try:
+ assert scheduler_module._ensure_autocron_cgroup() is None
+ finally:
+ scheduler_module._ensure_autocron_cgroup.cache_clear()
+
+ assert (parent / "cgroup.subtree_control").read_text() == "\n"
+ assert not list(root.rglob("autocron-*"))
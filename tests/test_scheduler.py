@@ -1,10 +1,13 @@
 """Tests for scheduler functionality."""
 
+import sys
+import threading
 import time
+from datetime import datetime, timedelta
 
 import pytest
 
-from autocron.core.scheduler import AutoCron, Task, schedule
+from autocron.core.scheduler import AutoCron, CronTask, IntervalTask, Task, schedule
 
 
 class TestTask:
@@ -87,6 +90,79 @@ class TestTask:
 
  assert not task.should_run()
 
+ def test_should_run_ignores_wall_clock_jumps(self, monkeypatch):
+ """Test that due checks use the monotonic clock."""
+
+ def my_func():
+ pass
+
+ task = Task(name="test_task", func=my_func, every="1m")
+ task.update_next_run()
+
+ wall_clock = time.time
+ monkeypatch.setattr(time, "time", lambda: wall_clock() + 3600)
+ assert not task.should_run()
+
+ def test_complete_run_updates_counts_and_schedule(self):
+ """Test that a finished run is recorded in one step."""
+ task = Task(name="test_task", script="job.py", every="5m")
+
+ task.complete_run(success=True)
+ assert task.run_count == 1
+ assert task.last_run is not None
+ assert task.next_run == task.last_run + timedelta(minutes=5)
+
+ task.complete_run(success=False)
+ assert (task.run_count, task.fail_count) == (1, 1)
+
+ def test_task_specialized_by_schedule_type(self):
+ """Test that tasks are created as interval or cron subclasses."""
+ interval_task = Task("every", None, "job.py", "5m")
+ cron_task = Task(name="cron", script="job.py", cron="0 * * * *")
+
+ assert isinstance(interval_task, IntervalTask)
+ assert isinstance(cron_task, CronTask)
+ assert isinstance(cron_task, Task)
+ assert cron_task.next_run.minute == 0
+ assert not hasattr(cron_task, "__dict__")
+
+ def test_task_subclass_must_calculate_next_run(self):
+ """Test that a Task subclass without its own schedule logic is rejected."""
+
+ class UnscheduledTask(Task):
+ __slots__ = ()
+
+ with pytest.raises(TypeError, match="_calculate_next_run"):
+ UnscheduledTask(name="test_task", script="job.py", every="5m")
+
+ def test_task_has_fixed_attribute_layout(self):
+ """Test that tasks use slots instead of a per-instance dict."""
+ task = Task(name="test_task", script="job.py", every="5m")
+
+ assert not hasattr(task, "__dict__")
+ with pytest.raises(AttributeError):
+ task.unknown_attribute = True
+
+ def test_schedule_strings_shared(self):
+ """Test that tasks with equal schedules and scripts share their strings."""
+ first = Task(name="first", script="".join(["job", ".py"]), every="".join(["5", "m"]))
+ second = Task(name="second", script="".join(["job", ".py"]), every="".join(["5", "m"]))
+
+ assert first.schedule_value is second.schedule_value
+ assert first.script is second.script
+
+ def test_notify_channels_normalized(self):
+ """Test that notification channels are normalized when notify is set."""
+ task = Task(name="test_task", script="job.py", every="5m", notify="desktop")
+ assert task._notify_channels == ("desktop",)
+
+ task.notify = ["desktop", "email"]
+ assert task.notify == ["desktop", "email"]
+ assert task._notify_channels == ("desktop", "email")
+
+ task.notify = None
+ assert task._notify_channels == ()
+
 
 class TestAutoCron:
  """Test AutoCron scheduler."""
@@ -158,6 +234,53 @@ class TestAutoCron:
  assert removed
  assert len(scheduler.tasks) == 0
 
+ def test_clear_tasks(self):
+ """Test removing all tasks at once."""
+ scheduler = AutoCron()
+
+ def my_func():
+ pass
+
+ scheduler.add_task(name="task1", func=my_func, every="5m")
+ scheduler.add_task(name="task2", func=my_func, every="10m")
+
+ assert scheduler.clear_tasks() == 2
+ assert scheduler.list_tasks() == []
+ assert scheduler.get_task(name="task1") is None
+ assert scheduler.clear_tasks() == 0
+
+ def test_task_table_is_copied_on_write(self):
+ """Test that readers keep a stable snapshot while tasks change."""
+ scheduler = AutoCron()
+
+ def my_func():
+ pass
+
+ first_id = scheduler.add_task(name="first", func=my_func, every="5m")
+ snapshot = scheduler.tasks
+
+ scheduler.add_task(name="second", func=my_func, every="5m")
+ scheduler.remove_task(task_id=first_id)
+
+ assert list(snapshot) == [first_id]
+ assert [task.name for task in scheduler.list_tasks()] == ["second"]
+
+ def test_name_lookup_with_duplicate_names(self):
+ """Test that name lookups find the earliest task with that name."""
+ scheduler = AutoCron()
+
+ def my_func():
+ pass
+
+ first_id = scheduler.add_task(name="dup", func=my_func, every="5m")
+ second_id = scheduler.add_task(name="dup", func=my_func, every="10m")
+
+ assert scheduler.get_task(name="dup").task_id == first_id
+ assert scheduler.remove_task(name="dup")
+ assert scheduler.get_task(name="dup").task_id == second_id
+ assert scheduler.remove_task(name="dup")
+ assert scheduler.get_task(name="dup") is None
+
  def test_get_task_by_id(self):
  """Test getting task by ID."""
  scheduler = AutoCron()
@@ -263,6 +386,30 @@ class TestAutoCron:
  assert task.run_count == 0
  assert task.fail_count == 1
 
+ def test_timed_sync_functions_reuse_threads(self):
+ """Test that sync functions with a timeout run on reused daemon threads."""
+ scheduler = AutoCron()
+ threads = []
+
+ def record_thread():
+ threads.append(threading.current_thread())
+ return len(threads)
+
+ assert scheduler._execute_function(record_thread, timeout=5) == 1
+ assert scheduler._execute_function(record_thread, timeout=5) == 2
+ assert threads[0] is threads[1]
+ assert threads[0].daemon
+
+ def test_timeout_error_raised_by_function_propagates(self):
+ """Test that a TimeoutError from the function itself is not reported as a timeout."""
+ scheduler = AutoCron()
+
+ def raise_timeout():
+ raise TimeoutError("socket timed out")
+
+ with pytest.raises(TimeoutError, match="socket timed out"):
+ scheduler._execute_function(raise_timeout, timeout=5)
+
 
 class TestScheduleDecorator:
  """Test schedule decorator."""
@@ -370,6 +517,75 @@ class TestAdvancedScheduler:
  scheduler.stop()
  # Should not raise error
 
+ def test_stop_requeues_runs_waiting_for_a_worker(self):
+ """Test that runs cancelled by stop() run again after a restart."""
+ scheduler = AutoCron(max_workers=1)
+ blocker_started, release_blocker, queued_ran = (threading.Event() for _ in range(3))
+
+ def blocker():
+ blocker_started.set()
+ release_blocker.wait(5)
+
+ scheduler.add_task(name="blocker", func=blocker, every="1h")
+ scheduler.add_task(name="queued", func=queued_ran.set, every="1h")
+ scheduler.start(blocking=False)
+ assert blocker_started.wait(5)
+
+ stopper = threading.Thread(target=scheduler.stop)
+ stopper.start()
+ # Wait until stop() has cancelled the queued run (its slot is released)
+ deadline = time.monotonic() + 5
+ while scheduler._run_slots._value < 1 and time.monotonic() < deadline:
+ time.sleep(0.01)
+ release_blocker.set()
+ stopper.join(5)
+ assert not queued_ran.is_set()
+
+ scheduler.start(blocking=False)
+ try:
+ assert queued_ran.wait(5)
+ finally:
+ scheduler.stop()
+
+ def test_task_raising_system_exit_stays_scheduled(self):
+ """Test that a task escaping with a BaseException is logged and runs again."""
+ scheduler = AutoCron()
+ runs = []
+ ran_twice = threading.Event()
+
+ def exits():
+ runs.append(time.monotonic())
+ if len(runs) >= 2:
+ ran_twice.set()
+ sys.exit(1)
+
+ task_id = scheduler.add_task(name="exits", func=exits, every="1s")
+ scheduler.start(blocking=False)
+ try:
+ assert ran_twice.wait(5)
+ finally:
+ scheduler.stop()
+
+ assert scheduler.get_task(task_id=task_id).fail_count >= 1
+
+ def test_tasks_due_after_suspend(self, monkeypatch):
+ """Test that a wall-clock jump past next_run makes the task due."""
+ from types import SimpleNamespace
+
+ from autocron.core import scheduler as scheduler_module
+
+ scheduler = AutoCron()
+ task_id = scheduler.add_task(name="hourly", func=lambda: None, every="1h")
+ scheduler.get_task(task_id=task_id).next_run = datetime.now() + timedelta(hours=1)
+ assert scheduler._pop_due_tasks()[0] == []
+
+ # The monotonic clock stood still while the wall clock moved past next_run
+ suspended = SimpleNamespace(monotonic=time.monotonic, time=lambda: time.time() + 2 * 3600)
+ monkeypatch.setattr(scheduler_module, "time", suspended)
+ due, _ = scheduler._pop_due_tasks()
+
+ assert [task.task_id for task in due] == [task_id]
+
  def test_task_repr(self):
  """Test task string representation."""
  from autocron.core.scheduler import Task
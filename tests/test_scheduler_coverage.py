@@ -11,7 +11,9 @@ Focus areas:
 
 import asyncio
 import subprocess
+import threading
 import time
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
@@ -133,7 +135,9 @@ print(f"AUTOCRON_SAFE_MODE={os.environ.get('AUTOCRON_SAFE_MODE', 'not_set')}")
  scheduler = AutoCron()
 
  # Test with invalid memory limit
- with patch("resource.setrlimit", side_effect=ValueError("Invalid limit")):
+ with patch("resource.setrlimit", side_effect=ValueError("Invalid limit")), patch(
+ "resource.prlimit", side_effect=ValueError("Invalid limit"), create=True
+ ):
  # Should not raise, but log warning
  output = scheduler._execute_in_safe_mode(
  str(script), timeout=5, max_memory_mb=10, max_cpu_percent=None
@@ -206,7 +210,9 @@ print('Worker done')
  time.sleep(0.5)
 
  # Only 2 should be running
- active_threads = len([t for t in scheduler._executor_threads if t.is_alive()])
+ active_threads = len(
+ [t for t in threading.enumerate() if t.name.startswith("autocron_")]
+ )
  assert active_threads <= 2
 
  scheduler.stop()
@@ -433,6 +439,25 @@ raise ValueError("Test error")
  with pytest.raises(TaskExecutionError):
  scheduler._execute_script(str(script), timeout=5)
 
+ def test_execute_script_with_large_output(self, tmp_path):
+ """Test that output larger than a pipe buffer is captured in full"""
+ script = tmp_path / "chatty.py"
+ script.write_text(
+ """
+import sys
+sys.stdout.write("x" * 200_000 + "\\n")
+sys.stderr.write("warning\\n")
+"""
+ )
+
+ scheduler = AutoCron()
+ output = scheduler._execute_script(str(script), timeout=5)
+ assert output == "x" * 200_000 + "\n"
+
+ script.write_text("import sys\nsys.exit('bad input')\n")
+ with pytest.raises(TaskExecutionError, match="exit code 1: bad input"):
+ scheduler._execute_script(str(script), timeout=5)
+
  def test_async_function_timeout(self):
  """Test async function timeout"""
 
@@ -445,6 +470,38 @@ raise ValueError("Test error")
  with pytest.raises(TaskExecutionError, match="timed out"):
  scheduler._execute_async_function(slow_async_func, timeout=1)
 
+ def test_async_functions_share_one_event_loop(self):
+ """Test that async tasks reuse the background loop until stop"""
+
+ async def current_loop():
+ return asyncio.get_running_loop()
+
+ scheduler = AutoCron()
+ scheduler.start(blocking=False)
+ first = scheduler._execute_async_function(current_loop, timeout=5)
+ assert scheduler._execute_async_function(current_loop, timeout=None) is first
+
+ scheduler.stop()
+ assert first.is_closed()
+ assert scheduler._async_loop is None
+
+ def test_async_timeout_cancels_coroutine(self):
+ """Test that a timed-out coroutine is cancelled on the shared loop"""
+ cancelled = threading.Event()
+
+ async def slow_async_func():
+ try:
+ await asyncio.sleep(10)
+ except asyncio.CancelledError:
+ cancelled.set()
+ raise
+
+ scheduler = AutoCron()
+ with pytest.raises(TaskExecutionError, match="timed out"):
+ scheduler._execute_async_function(slow_async_func, timeout=0.2)
+ assert cancelled.wait(2)
+ scheduler._stop_async_loop()
+
 
 class TestOSSchedulerIntegration:
  """Test OS-native scheduler integration (Windows Task Scheduler / cron)"""
@@ -558,5 +615,117 @@ class TestIntervalToCronConversion:
  assert cron == arg1
 
 
+class TestDeadlineScheduling:
+ """Test the heap-driven main loop"""
+
+ def _wait_for(self, condition, timeout=3.0):
+ deadline = time.time() + timeout
+ while not condition() and time.time() < deadline:
+ time.sleep(0.02)
+ return condition()
+
+ def test_task_added_while_running_starts_promptly(self):
+ """Test that adding a task wakes an idle scheduler"""
+ runs = []
+ scheduler = AutoCron()
+ scheduler.start(blocking=False)
+ try:
+ time.sleep(0.1)
+ scheduler.add_task(name="late", func=lambda: runs.append(1), every="1h")
+ assert self._wait_for(lambda: runs, timeout=0.5)
+ finally:
+ scheduler.stop()
+
+ def test_changing_next_run_reschedules_task(self):
+ """Test that moving next_run earlier is picked up by the loop"""
+ runs = []
+ scheduler = AutoCron()
+ scheduler.add_task(name="hourly", func=lambda: runs.append(1), every="1h")
+ scheduler.start(blocking=False)
+ try:
+ assert self._wait_for(lambda: len(runs) == 1)
+ task = scheduler.get_task(name="hourly")
+ assert self._wait_for(lambda: task.last_run is not None)
+
+ task.next_run = datetime.now()
+ assert self._wait_for(lambda: len(runs) == 2, timeout=0.5)
+ finally:
+ scheduler.stop()
+
+ def test_removed_and_disabled_tasks_do_not_run(self):
+ """Test that stale heap entries are skipped"""
+ runs = []
+ scheduler = AutoCron()
+ scheduler.add_task(name="removed", func=lambda: runs.append("removed"), every="1h")
+ scheduler.add_task(name="disabled", func=lambda: runs.append("disabled"), every="1h")
+ scheduler.remove_task(name="removed")
+ scheduler.get_task(name="disabled").enabled = False
+
+ scheduler.start(blocking=False)
+ time.sleep(0.3)
+ scheduler.stop()
+ assert runs == []
+
+ def test_schedule_changes_applied_by_loop(self):
+ """Test that producers queue heap changes for the loop thread"""
+ scheduler = AutoCron()
+ task_id = scheduler.add_task(name="queued", func=lambda: None, every="1h")
+ assert scheduler._heap == []
+
+ due, delay = scheduler._pop_due_tasks()
+ assert [task.task_id for task in due] == [task_id]
+ assert delay is None
+
+ scheduler.remove_task(task_id=task_id)
+ scheduler._apply_commands()
+ assert task_id not in scheduler._tokens
+
+ def test_stale_heap_entries_are_compacted(self):
+ """Test that repeated reschedules do not grow the heap without bound"""
+ scheduler = AutoCron()
+ scheduler.add_task(name="moving", func=lambda: None, every="1h")
+ task = scheduler.get_task(name="moving")
+
+ for minutes in range(500):
+ task.next_run = datetime.now() + timedelta(minutes=minutes + 1)
+ scheduler._apply_commands()
+
+ assert len(scheduler._heap) <= 2 + scheduler.HEAP_SLACK
+ due, delay = scheduler._pop_due_tasks()
+ assert due == []
+ assert delay == pytest.approx(500 * 60, abs=5)
+
+ def test_only_earlier_deadlines_wake_the_loop(self):
+ """Test that rescheduling past the pending wake-up does not signal the loop"""
+ scheduler = AutoCron()
+ scheduler.add_task(name="later", func=lambda: None, every="1h")
+ task = scheduler.get_task(name="later")
+ scheduler._next_wake = time.monotonic() + 60
+ scheduler._wake.clear()
+
+ task.next_run = datetime.now() + timedelta(hours=1)
+ scheduler.remove_task(name="later")
+ assert not scheduler._wake.is_set()
+
+ scheduler.add_task(name="sooner", func=lambda: None, every="1h")
+ assert scheduler._wake.is_set()
+
+ def test_readded_task_id_does_not_revive_stale_entries(self):
+ """Test that heap entries of a removed task stay stale when its id returns"""
+ scheduler = AutoCron()
+ task_id = scheduler.add_task(name="reloaded", func=lambda: None, every="1h")
+ task = scheduler.get_task(task_id=task_id)
+ scheduler._apply_commands()
+
+ scheduler.remove_task(task_id=task_id)
+ task.next_run = datetime.now() + timedelta(hours=1)
+ scheduler._publish_tasks({task_id: task})
+ scheduler._track_task(task)
+
+ due, delay = scheduler._pop_due_tasks()
+ assert due == []
+ assert delay == pytest.approx(3600, abs=5)
+
+
 if __name__ == "__main__":
  pytest.main([__file__, "-v"])
@@ -6,6 +6,7 @@ import pytest
 
 from autocron.core.utils import (
  TimeParseError,
+ _compiled_cron,
  calculate_retry_delay,
  format_timedelta,
  get_next_run_time,
@@ -62,6 +63,13 @@ class TestParseInterval:
  with pytest.raises(TimeParseError):
  parse_interval("m5")
 
+ def test_parsed_interval_is_cached(self):
+ """Test that repeated interval strings are parsed once."""
+ parse_interval("13m")
+ hits = parse_interval.cache_info().hits
+ assert parse_interval("13m") == 780
+ assert parse_interval.cache_info().hits == hits + 1
+
 
 class TestValidateCronExpression:
  """Test cron expression validation."""
@@ -79,6 +87,20 @@ class TestValidateCronExpression:
  assert not validate_cron_expression("60 * * * *")
  assert not validate_cron_expression("* * * *")
 
+ def test_prefilter_keeps_croniter_syntax(self):
+ """Test that names, aliases and special characters still reach croniter."""
+ assert validate_cron_expression("@daily")
+ assert validate_cron_expression("0 9 * * mon-fri")
+ assert validate_cron_expression("0 0 L * *")
+ assert validate_cron_expression("0 0 * * 1#2")
+ assert not validate_cron_expression("0 9 * * *; rm -rf /")
+ assert not validate_cron_expression("")
+
+ def test_non_string_input(self):
+ """Test that non-string input is rejected, including unhashable values."""
+ assert not validate_cron_expression(None)
+ assert not validate_cron_expression(["0", "9", "*", "*", "*"])
+
 
 class TestPlatformInfo:
  """Test platform information."""
@@ -166,6 +188,15 @@ class TestGetNextRunTime:
  with pytest.raises(TimeParseError):
  get_next_run_time("invalid", datetime.now())
 
+ def test_parsed_expression_is_reused(self):
+ """Test that repeated calls share one parsed expression."""
+ first = get_next_run_time("*/5 * * * *", datetime(2025, 1, 1, 12, 3))
+ second = get_next_run_time("*/5 * * * *", datetime(2025, 6, 1, 8, 58))
+
+ assert first == datetime(2025, 1, 1, 12, 5)
+ assert second == datetime(2025, 6, 1, 9, 0)
+ assert _compiled_cron.cache_info().hits >= 1
+
 
 class TestCalculateRetryDelay:
  """Test retry delay calculation."""
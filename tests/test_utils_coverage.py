@@ -9,6 +9,9 @@ Covers:
 - ensure_directory
 """
 
+import threading
+import time
+
 from autocron.core.utils import (
  SingletonMeta,
  ensure_directory,
@@ -63,6 +66,30 @@ class TestSingletonMeta:
  assert instance_a is not instance_b
  assert type(instance_a) is not type(instance_b)
 
+ def test_singleton_created_once_under_concurrency(self):
+ """Test that racing first calls all get the single instance"""
+ created = []
+ barrier = threading.Barrier(8)
+
+ class SlowSingleton(metaclass=SingletonMeta):
+ def __init__(self):
+ created.append(self)
+ time.sleep(0.01)
+
+ def create(results):
+ barrier.wait()
+ results.append(SlowSingleton())
+
+ results = []
+ threads = [threading.Thread(target=create, args=(results,)) for _ in range(8)]
+ for thread in threads:
+ thread.start()
+ for thread in threads:
+ thread.join()
+
+ assert len(created) == 1
+ assert all(instance is created[0] for instance in results)
+
 
 class TestSafeImport:
  """Test safe_import utility"""
@@ -6,10 +6,16 @@ and working on your system.
 """
 
 import importlib
+import importlib.util
 import platform
 import sys
 from typing import List, Tuple
 
+# Looked up once; platform.platform() may shell out to uname
+_SYSTEM = platform.system()
+_PLATFORM = platform.platform()
+_MACHINE = platform.machine()
+
 
 def print_header(text: str) -> None:
  """Print section header."""
@@ -35,10 +41,10 @@ def check_python_version() -> bool:
 def check_platform() -> bool:
  """Check platform compatibility."""
  print_header("Platform Check")
- system = platform.system()
+ system = _SYSTEM
  print(f"Operating System: {system}")
- print(f"Platform: {platform.platform()}")
- print(f"Machine: {platform.machine()}")
+ print(f"Platform: {_PLATFORM}")
+ print(f"Machine: {_MACHINE}")
 
  if system in ["Windows", "Linux", "Darwin"]:
  print(f" Platform '{system}' is supported")
@@ -48,6 +54,11 @@ def check_platform() -> bool:
  return False
 
 
+def is_installed(import_name: str) -> bool:
+ """Check whether a module can be found, without importing it."""
+ return importlib.util.find_spec(import_name) is not None
+
+
 def check_dependencies() -> Tuple[bool, List[str]]:
  """Check required dependencies."""
  print_header("Dependencies Check")
@@ -68,32 +79,29 @@ def check_dependencies() -> Tuple[bool, List[str]]:
  # Check required dependencies
  print("\nRequired dependencies:")
  for package_name, import_name in required.items():
- try:
- importlib.import_module(import_name)
+ if is_installed(import_name):
  print(f" {package_name}")
- except ImportError:
+ else:
  print(f" {package_name} - MISSING")
  missing.append(package_name)
 
  # Check platform-specific dependencies
- system = platform.system()
+ system = _SYSTEM
  if system in platform_specific:
  print(f"\nPlatform-specific dependencies ({system}):")
  for package_name, import_name in platform_specific[system].items():
- try:
- importlib.import_module(import_name)
+ if is_installed(import_name):
  print(f" {package_name}")
- except ImportError:
+ else:
  print(f" {package_name} - MISSING")
  missing.append(package_name)
 
  # Check optional dependencies
  print("\nOptional dependencies:")
  for package in optional:
- try:
- importlib.import_module(package)
+ if is_installed(package):
  print(f" {package}")
- except ImportError:
+ else:
  print(f" {package} - Not installed (optional)")
 
  return not missing, missing
@@ -118,27 +126,35 @@ def check_autocron_components() -> bool:
  """Check AutoCron components."""
  print_header("AutoCron Components Check")
 
+ # Component -> (module, attribute); a None attribute checks the module itself
  components = {
- "AutoCron": "autocron.AutoCron",
- "schedule": "autocron.schedule",
- "Task": "autocron.scheduler.Task",
- "Logger": "autocron.logger.AutoCronLogger",
- "Notifier": "autocron.notifications.NotificationManager",
- "Utils": "autocron.utils",
- "OS Adapters": "autocron.os_adapters",
+ "AutoCron": ("autocron", "AutoCron"),
+ "schedule": ("autocron", "schedule"),
+ "Task": ("autocron.core.scheduler", "Task"),
+ "Logger": ("autocron.logging.logger", "AutoCronLogger"),
+ "Notifier": ("autocron.interface.notifications", "NotificationManager"),
+ "Utils": ("autocron.core.utils", None),
+ "OS Adapters": ("autocron.core.os_adapters", None),
  }
 
- all_ok = True
- for name, import_path in components.items():
+ # Import each module once, even when several components live in it
+ modules = {}
+ for module_name in dict.fromkeys(module for module, _ in components.values()):
  try:
- parts = import_path.split(".")
- module = importlib.import_module(".".join(parts[:-1]))
- if len(parts) > 1 and hasattr(module, parts[-1]):
+ modules[module_name] = importlib.import_module(module_name)
+ except Exception as e:
+ modules[module_name] = e
+
+ all_ok = True
+ for name, (module_name, attr) in components.items():
+ module = modules[module_name]
+ if isinstance(module, Exception):
+ print(f" {name}: {module}")
+ all_ok = False
+ elif attr is None or hasattr(module, attr):
  print(f" {name}")
  else:
- print(f" {name} module")
- except Exception as e:
- print(f" {name}: {e}")
+ print(f" {name}: {module_name} has no attribute '{attr}'")
  all_ok = False
 
  return all_ok